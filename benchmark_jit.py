@@ -0,0 +1,91 @@
+# benchmark_jit.py
+"""
+Benchmark the accelerated D / y kernels against the original pure-Python
+scalar loops on a 1M-point (x, y, A) sweep.
+
+    python benchmark_jit.py            # 1,000,000 points, requires >= 20x
+    python benchmark_jit.py 200000 10  # custom size and required speedup
+"""
+import sys
+import time
+
+import numpy as np
+from classcode.jit import BACKEND
+from classcode.dsolver import newton_D_batch
+from classcode.ysolver import newton_y_batch
+
+
+def python_D(x, y, A):
+    """The original scalar loop (as in StableSwapD.calculate_D)."""
+    S = x + y
+    if S == 0:
+        return 0
+    D = S
+    Ann = A * 4
+    for _ in range(255):
+        D_prev = D
+        D_P = D * D * D / (4 * x * y)
+        D = (Ann * S + D_P * 2) * D / ((Ann - 1) * D + D_P * 3)
+        if abs(D - D_prev) <= 1:
+            break
+    return D
+
+
+def python_y(x_new, D, A):
+    """The original scalar loop (as in CurveStableSwap2Pool._get_y)."""
+    Ann = A * 4
+    c = D * D * D / (4 * Ann * x_new)
+    b = x_new + D / Ann
+    y_prev = D
+    for _ in range(255):
+        y = y_prev
+        y_prev = (y * y + c) / (2 * y + b - D)
+        if abs(y - y_prev) <= 1:
+            break
+    return y_prev
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - start
+
+
+def main(n=1_000_000, required=20.0):
+    rng = np.random.default_rng(0)
+    x = rng.uniform(1e5, 2e6, n)
+    y = rng.uniform(1e5, 2e6, n)
+    A = rng.choice([1.0, 10.0, 100.0, 1000.0], n)
+
+    # warm up (JIT compilation / cache load is not part of the sweep)
+    newton_D_batch(x[:10], y[:10], A[:10])
+    newton_y_batch(x[:10], 2e6, A[:10])
+
+    D_ref, t_py_D = timed(lambda: [python_D(a, b, c) for a, b, c in zip(x.tolist(), y.tolist(), A.tolist())])
+    D_fast, t_fast_D = timed(newton_D_batch, x, y, A)
+    y_ref, t_py_y = timed(lambda: [python_y(a, 2e6, c) for a, c in zip(x.tolist(), A.tolist())])
+    y_fast, t_fast_y = timed(newton_y_batch, x, 2e6, A)
+
+    err_D = np.max(np.abs(np.array(D_ref) - D_fast))
+    err_y = np.max(np.abs(np.array(y_ref) - y_fast))
+
+    print(f"backend: {BACKEND}, points: {n:,}")
+    print(f"{'kernel':<6} {'python (s)':>12} {'accelerated (s)':>16} {'speedup':>9} {'max |diff|':>12}")
+    ok = True
+    for name, t_py, t_fast, err in (("D", t_py_D, t_fast_D, err_D), ("y", t_py_y, t_fast_y, err_y)):
+        speedup = t_py / t_fast
+        ok &= speedup >= required
+        print(f"{name:<6} {t_py:>12.3f} {t_fast:>16.4f} {speedup:>8.1f}x {err:>12.3g}")
+
+    if not ok:
+        print(f"❌ speedup below {required}x")
+        return 1
+    print(f"✅ speedup >= {required}x")
+    return 0
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    n = int(args[0]) if args else 1_000_000
+    required = float(args[1]) if len(args) > 1 else 20.0
+    sys.exit(main(n, required))
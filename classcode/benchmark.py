@@ -1,12 +1,12 @@
 # classcode/benchmark.py
-import numpy as np
-from classcode.ystate import YState
 from classcode.checkstates import CheckStates
+from classcode.resultframe import result_frame
 
 class BenchmarkAMM:
     def __init__(self, xb=1_000_000, yb=1_000_000, A=100, n=200,
                  csv_file="/tmp/stableswap.csv", csv_remote="stableswap.csv",
-                 plot_file="/tmp/stableswap.png", plot_remote="stableswap.png"):
+                 plot_file="/tmp/stableswap.png", plot_remote="stableswap.png",
+                 solver="newton", d_solver="newton"):
         self.xb = xb
         self.yb = yb
         self.A = A
@@ -16,21 +16,20 @@ class BenchmarkAMM:
         self.plot_file = plot_file
         self.plot_remote = plot_remote
 
-        self.pool = YState(self.xb, self.yb, self.A)
+        # Shared with every other consumer of the same parameter set, so
+        # D and the y column are solved once per process
+        self.frame = result_frame(self.xb, self.yb, self.A, self.n, solver, d_solver)
+        self.pool = self.frame.pool
         self.checker = CheckStates(self.A, self.pool.D)
         ## self.x_values = np.linspace(self.xb / 2, self.xb * 1.5, self.n)
-        self.x_values = np.linspace(self.xb / 10, self.xb *4 , self.n)
+        self.x_values = self.frame.x
 
         self.y_values = []
         self.delta_values = []
 
     def run_test(self):
-        rows = []
-        for x in self.x_values:
-            y = self.pool.get_y(x)
-            delta = self.checker.delta(x, y)
-            rows.append([x, y, delta])
-            self.y_values.append(y)
-            self.delta_values.append(delta)
+        rows = self.frame.rows("x", "y", "delta")
+        self.y_values = self.frame.y.tolist()
+        self.delta_values = self.frame.delta.tolist()
         return rows
 
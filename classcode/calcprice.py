@@ -1,7 +1,7 @@
 # classcode/calcprice.py
 import csv
 import matplotlib.pyplot as plt
-from uploader import upload_file
+from uploader import upload_or_plan
 from classcode.plotamm import PlotAMM
 
 class CalcPrice(PlotAMM):
@@ -19,15 +19,11 @@ class CalcPrice(PlotAMM):
         print(f"🔎 Debug: num and dem num ={numerator} dem={denominator}")
         return numerator / denominator
 
-    def generate_csv_with_price(self):
+    def generate_csv_with_price(self, upload: bool = True):
         rows = self.run_test()
 
-        priced_rows = []
-        prices = []
-        for (x, y, delta) in rows:
-            p = self.compute_price(x, y)
-            priced_rows.append([x, y, delta, p])
-            prices.append(p)
+        prices = self.frame.price.tolist()
+        priced_rows = [row + [p] for row, p in zip(rows, prices)]
 
         # Save CSV locally
         with open(self.csv_file, "w", newline="") as f:
@@ -37,8 +33,7 @@ class CalcPrice(PlotAMM):
         print(f"✅ CSV with price saved locally at {self.csv_file}")
 
         # Upload CSV to S3
-        csv_result = upload_file(self.csv_file, self.csv_remote)
-        print("✅ CSV upload result:", csv_result)
+        csv_result = upload_or_plan(self.csv_file, self.csv_remote, upload, "CSV upload")
 
         # --- Plot price vs. x ---
         plt.figure(figsize=(8, 6))
@@ -53,8 +48,7 @@ class CalcPrice(PlotAMM):
         plt.savefig(self.plot_file)
         print(f"✅ Price plot saved locally at {self.plot_file}")
 
-        plot_result = upload_file(self.plot_file, self.plot_remote)
-        print("✅ Plot upload result:", plot_result)
+        plot_result = upload_or_plan(self.plot_file, self.plot_remote, upload, "Plot upload")
 
         return {"csv": csv_result, "plot": plot_result}
 
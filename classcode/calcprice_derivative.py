@@ -1,7 +1,7 @@
 # classcode/calcprice_derivative.py
 import csv
 import matplotlib.pyplot as plt
-from uploader import upload_file
+from uploader import upload_or_plan
 from classcode.plotamm import PlotAMM
 
 class CalcPriceDerivative(PlotAMM):
@@ -33,16 +33,12 @@ class CalcPriceDerivative(PlotAMM):
 
         return numerator / denominator
 
-    def generate_csv_with_derivative_price(self):
+    def generate_csv_with_derivative_price(self, upload: bool = True):
         rows = self.run_test()
 
-        derivative_rows = []
-        dpdx_values = []
-        for (x, y, delta) in rows:
-            dy_dx = -1  # placeholder, you can compute directly if needed
-            dpdx = self.compute_dpdx(x, y, dy_dx)
-            derivative_rows.append([x, y, delta, dpdx])
-            dpdx_values.append(dpdx)
+        # Equal to compute_dpdx(x, y, dy/dx) with the analytic slope at each point
+        dpdx_values = self.frame.dpdx.tolist()
+        derivative_rows = [row + [dpdx] for row, dpdx in zip(rows, dpdx_values)]
 
         # Save CSV locally
         with open(self.csv_file, "w", newline="") as f:
@@ -52,8 +48,7 @@ class CalcPriceDerivative(PlotAMM):
         print(f"✅ CSV with derivative price saved locally at {self.csv_file}")
 
         # Upload CSV to S3
-        csv_result = upload_file(self.csv_file, self.csv_remote)
-        print("✅ CSV upload result:", csv_result)
+        csv_result = upload_or_plan(self.csv_file, self.csv_remote, upload, "CSV upload")
 
         # --- Plot dp/dx vs. x ---
         plt.figure(figsize=(8, 6))
@@ -70,8 +65,7 @@ class CalcPriceDerivative(PlotAMM):
         plt.savefig(self.plot_file)
         print(f"✅ Derivative price plot saved locally at {self.plot_file}")
 
-        plot_result = upload_file(self.plot_file, self.plot_remote)
-        print("✅ Plot upload result:", plot_result)
+        plot_result = upload_or_plan(self.plot_file, self.plot_remote, upload, "Plot upload")
 
         return {"csv": csv_result, "plot": plot_result}
 
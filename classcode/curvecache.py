@@ -0,0 +1,143 @@
+# classcode/curvecache.py
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from .ysolver import quadratic_y
+from .pricing import marginal_price
+
+# Upper bound on the memory held by the process-wide cache (a high-A curve
+# at tol=1e-10 is ~100k nodes, a few MB)
+CURVE_CACHE_BYTES = int(os.environ.get("CURVE_CACHE_BYTES", 64 << 20))
+
+
+class NormalizedCurve:
+    """
+    The n=2 curve is homogeneous in (x, y, D), so for fixed A
+        y(x; A, D) = D * f(x / D; A)
+    This holds f(u; A) (the curve at D = 1) as a cubic Hermite interpolant
+    in log-log space, using the analytic slope at every node. The grid is
+    doubled until the relative error at interval midpoints, checked against
+    the closed-form solve, is below tol; max_rel_error records that bound.
+    Points outside [u_min, u_max] are solved exactly.
+    """
+
+    def __init__(self, A: float, tol: float = 1e-10, u_min: float = 1e-3, u_max: float = 1e3,
+                 n_start: int = 257, max_points: int = 1 << 18):
+        self.A = A
+        self.tol = tol
+        self.u_min = u_min
+        self.u_max = u_max
+
+        t = np.linspace(np.log(u_min), np.log(u_max), n_start)
+        f = quadratic_y(np.exp(t), 1.0, A)
+        while True:
+            self._set_nodes(t, f)
+            t_mid = (t[:-1] + t[1:]) / 2
+            f_mid = quadratic_y(np.exp(t_mid), 1.0, A)
+            self.max_rel_error = float(np.max(np.abs(self._eval_log(t_mid) - np.log(f_mid))))
+            if self.max_rel_error <= tol or 2 * t.size - 1 > max_points:
+                break
+            # Refine by inserting the midpoints we have already solved
+            t_new = np.empty(2 * t.size - 1)
+            f_new = np.empty_like(t_new)
+            t_new[0::2], t_new[1::2] = t, t_mid
+            f_new[0::2], f_new[1::2] = f, f_mid
+            t, f = t_new, f_new
+
+    def _set_nodes(self, t, f):
+        u = np.exp(t)
+        self._t = t
+        self._logf = np.log(f)
+        # d(log f)/d(log u) = u * f'(u) / f, with f'(u) = -p
+        self._slope = -u * marginal_price(u, f, 1.0, self.A) / f
+
+    def _eval_log(self, t):
+        i = np.clip(np.searchsorted(self._t, t) - 1, 0, self._t.size - 2)
+        h = self._t[i + 1] - self._t[i]
+        s = (t - self._t[i]) / h
+        s2, s3 = s * s, s * s * s
+        return ((2 * s3 - 3 * s2 + 1) * self._logf[i]
+                + (s3 - 2 * s2 + s) * h * self._slope[i]
+                + (-2 * s3 + 3 * s2) * self._logf[i + 1]
+                + (s3 - s2) * h * self._slope[i + 1])
+
+    @property
+    def size(self) -> int:
+        return self._t.size
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the interpolant's node arrays"""
+        return self._t.nbytes + self._logf.nbytes + self._slope.nbytes
+
+    def __call__(self, u) -> np.ndarray:
+        """f(u; A) for an array of normalized balances u = x / D"""
+        u = np.asarray(u, dtype=float)
+        out = np.full(u.shape, np.nan)
+        inside = (u >= self.u_min) & (u <= self.u_max)
+        out[inside] = np.exp(self._eval_log(np.log(u[inside])))
+        outside = ~inside & (u > 0)
+        if outside.any():
+            out[outside] = quadratic_y(u[outside], 1.0, self.A)
+        return out
+
+    def y(self, x, D) -> np.ndarray:
+        """y for balances x on the curve with invariant D"""
+        return D * self(np.asarray(x, dtype=float) / D)
+
+
+class CurveCache:
+    """
+    Thread-safe LRU of NormalizedCurve objects keyed by (A, tol), bounded
+    both by entry count and by the total bytes of their node arrays (the
+    most recent curve is always kept, whatever its size).
+    """
+
+    def __init__(self, maxsize: int = 32, max_bytes: int = CURVE_CACHE_BYTES):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._curves = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, A: float, tol: float = 1e-10) -> NormalizedCurve:
+        key = (float(A), tol)
+        with self._lock:
+            curve = self._curves.get(key)
+            if curve is not None:
+                self._curves.move_to_end(key)
+                self.hits += 1
+                return curve
+            self.misses += 1
+
+        curve = NormalizedCurve(A, tol)
+
+        with self._lock:
+            old = self._curves.pop(key, None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+            self._curves[key] = curve
+            self.nbytes += curve.nbytes
+            while len(self._curves) > 1 and (len(self._curves) > self.maxsize
+                                             or self.nbytes > self.max_bytes):
+                _, evicted = self._curves.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+        return curve
+
+    def clear(self):
+        with self._lock:
+            self._curves.clear()
+            self.nbytes = 0
+
+
+# Process-wide cache shared by every caller
+curve_cache = CurveCache()
+
+
+def curve_y(x, A: float, D: float) -> np.ndarray:
+    """y(x) on the (A, D) curve via the shared normalized-curve cache"""
+    return curve_cache.get(A).y(x, D)
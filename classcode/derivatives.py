@@ -0,0 +1,44 @@
+# classcode/derivatives.py
+import numpy as np
+
+
+def _partials(x, y, D, A):
+    """
+    Partial derivatives of the n=2 invariant
+        F(x, y) = 4A(x + y) + D - 4AD - D^3 / (4xy)
+    returned as (F_x, F_y, F_xx, F_xy, F_yy).
+    """
+    K = np.asarray(D, dtype=float) ** 3 / 4
+    F_x = 4 * A + K / (x * x * y)
+    F_y = 4 * A + K / (x * y * y)
+    F_xx = -2 * K / (x ** 3 * y)
+    F_xy = -K / (x * x * y * y)
+    F_yy = -2 * K / (x * y ** 3)
+    return F_x, F_y, F_xx, F_xy, F_yy
+
+
+def dy_dx(x, y, D, A):
+    """
+    Slope of the curve at (x, y) by implicit differentiation,
+    dy/dx = -F_x / F_y (minus the marginal price); works on arrays.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        F_x, F_y, *_ = _partials(x, y, D, A)
+        slope = -F_x / F_y
+    return float(slope) if slope.ndim == 0 else slope
+
+
+def d2y_dx2(x, y, D, A):
+    """
+    Curvature term d²y/dx² = -(F_xx + 2 F_xy y' + F_yy y'²) / F_y,
+    with y' = dy/dx; positive, since the curve is convex. Works on arrays.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        F_x, F_y, F_xx, F_xy, F_yy = _partials(x, y, D, A)
+        y1 = -F_x / F_y
+        y2 = -(F_xx + 2 * F_xy * y1 + F_yy * y1 * y1) / F_y
+    return float(y2) if y2.ndim == 0 else y2
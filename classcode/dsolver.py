@@ -0,0 +1,130 @@
+# classcode/dsolver.py
+import numpy as np
+from .jit import JIT_ENABLED, newton_D_kernel, newton_D_ufunc
+
+
+def newton_D(x: float, y: float, A: float, tol: float = 1, max_iter: int = 255,
+             D0: float = None) -> float:
+    """
+    Scalar Newton iteration for the invariant D (n=2), seeded with D0 if
+    given. An empty pool has D = 0; otherwise non-positive balances give NaN.
+    """
+    if JIT_ENABLED:
+        D0 = np.nan if D0 is None else D0
+        return newton_D_kernel(float(x), float(y), float(A), float(D0), float(tol), max_iter)
+
+    S = x + y
+    if S == 0:
+        return 0
+    if not (x > 0 and y > 0):
+        return np.nan
+
+    D = S if D0 is None else D0
+    Ann = A * 4
+
+    for _ in range(max_iter):
+        D_P = D * D * D / (4 * x * y)
+        D_prev = D
+        numerator = (Ann * S + D_P * 2) * D
+        denominator = (Ann - 1) * D + D_P * 3
+        D = numerator / denominator
+        if abs(D - D_prev) <= tol:
+            break
+    return D
+
+
+def newton_D_batch(x, y, A, tol: float = 1, max_iter: int = 255, D0=None) -> np.ndarray:
+    """
+    Vectorized Newton iteration for D over arrays of (x, y, A).
+    Each element stops updating once it has converged.
+    D0 (scalar or array) warm-starts the iteration instead of S = x + y.
+    As in newton_D, non-positive balances give NaN (0 for an empty pool).
+    """
+    if JIT_ENABLED:
+        D0 = np.nan if D0 is None else D0
+        return np.asarray(newton_D_ufunc(x, y, A, D0, tol, max_iter), dtype=float)
+
+    x, y, A, D0 = np.broadcast_arrays(
+        np.asarray(x, dtype=float),
+        np.asarray(y, dtype=float),
+        np.asarray(A, dtype=float),
+        np.asarray(np.nan if D0 is None else D0, dtype=float),
+    )
+    shape = x.shape
+    x, y, A, D0 = x.ravel(), y.ravel(), A.ravel(), D0.ravel()
+
+    S = x + y
+    Ann = A * 4
+    D = np.where(np.isnan(D0), S, D0)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        positive = (x > 0) & (y > 0)
+        active = np.flatnonzero(positive)
+        for _ in range(max_iter):
+            if active.size == 0:
+                break
+            Da = D[active]
+            D_P = Da * Da * Da / (4 * x[active] * y[active])
+            numerator = (Ann[active] * S[active] + D_P * 2) * Da
+            denominator = (Ann[active] - 1) * Da + D_P * 3
+            D_next = numerator / denominator
+            D[active] = D_next
+            active = active[np.abs(D_next - Da) > tol]
+    D[~positive] = np.nan
+    D[S == 0] = 0
+    return D.reshape(shape)
+
+
+def cardano_D(x, y, A) -> np.ndarray:
+    """
+    Closed-form D for n=2 (same cubic as MathsCalcD / CalcD._calculate_D_2):
+        D^3 + p*D + q = 0,  p = 4xy(4A - 1),  q = -16*A*xy*(x + y)
+    Balances are normalised by S = x + y before solving, so large pools
+    do not overflow p^3. Both discriminant branches are handled
+    element-wise, and the single-real-root branch uses a cancellation-free
+    form of u + v. One Newton step on the cubic polishes the result.
+    """
+    x, y, A = np.broadcast_arrays(
+        np.asarray(x, dtype=float),
+        np.asarray(y, dtype=float),
+        np.asarray(A, dtype=float),
+    )
+    S = x + y
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        xy = (x / S) * (y / S)
+        p = 4 * xy * (4 * A - 1)
+        q = -16 * A * xy
+        discriminant = (q / 2) ** 2 + (p / 3) ** 3
+
+        # One real root: u + v = -q / (u^2 - uv + v^2) with uv = -p/3
+        u = np.cbrt(-q / 2 + np.sqrt(np.maximum(discriminant, 0)))
+        v = -p / (3 * u)
+        root_real = -q / (u * u + p / 3 + v * v)
+
+        # Irreducible case (only reachable for A < 1/4)
+        r = np.sqrt(np.maximum(-(p / 3) ** 3, 0))
+        phi = np.arccos(np.clip(-q / (2 * r), -1, 1))
+        root_trig = 2 * np.sqrt(np.maximum(-p / 3, 0)) * np.cos(phi / 3)
+
+        root = np.where(discriminant >= 0, root_real, root_trig)
+        root = root - (root ** 3 + p * root + q) / (3 * root ** 2 + p)
+
+    D = np.where(S == 0, 0.0, root * S)
+    return D
+
+
+D_SOLVERS = ("newton", "cardano")
+
+
+def compute_D(x, y, A, method: str = "cardano"):
+    """
+    Invariant D for (x, y, A); arrays are solved element-wise.
+    Defaults to the closed form; method="newton" keeps the iterative path.
+    Scalars in give a float back.
+    """
+    if method not in D_SOLVERS:
+        raise ValueError(f"Unknown D solver '{method}', expected one of {D_SOLVERS}")
+    scalar = np.ndim(x) == 0 and np.ndim(y) == 0 and np.ndim(A) == 0
+    if method == "newton":
+        return newton_D(x, y, A) if scalar else newton_D_batch(x, y, A)
+    D = cardano_D(x, y, A)
+    return float(D) if scalar else D
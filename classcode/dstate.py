@@ -1,33 +1,29 @@
 # classcode/dstate.py
-import math
+from .ysolver import SOLVERS
+from .dsolver import D_SOLVERS, compute_D, newton_D
 
 class DState:
     """
     Represents the invariant state of the AMM: x, y, A, D.
     D is computed from x, y, A at initialization.
+    solver picks the y engine used by subclasses ("newton" or "quadratic"),
+    d_solver picks the D engine ("newton" or "cardano").
     """
-    def __init__(self, xb: float, yb: float, A: int):
+    def __init__(self, xb: float, yb: float, A: int, solver: str = "newton",
+                 d_solver: str = "newton"):
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown solver '{solver}', expected one of {SOLVERS}")
+        if d_solver not in D_SOLVERS:
+            raise ValueError(f"Unknown D solver '{d_solver}', expected one of {D_SOLVERS}")
         self.x = float(xb)
         self.y = float(yb)
         self.A = int(A)
+        self.solver = solver
+        self.d_solver = d_solver
         self.D = self._calculate_D(xb, yb)
 
     def _calculate_D(self, x: float, y: float) -> float:
-        """Newton iteration for n=2 case."""
-        S = x + y
-        if S == 0:
-            return 0
-
-        D = S
-        Ann = self.A * 4
-
-        for _ in range(255):
-            D_P = D * D * D / (4 * x * y)
-            D_prev = D
-            numerator = (Ann * S + D_P * 2) * D
-            denominator = (Ann - 1) * D + D_P * 3
-            D = numerator / denominator
-            if abs(D - D_prev) <= 1:
-                break
-        return D
-
+        """Newton iteration for n=2 case, or the closed form if d_solver="cardano"."""
+        if self.d_solver == "cardano":
+            return compute_D(x, y, self.A)
+        return newton_D(x, y, self.A)
@@ -0,0 +1,79 @@
+# classcode/jit.py
+"""
+Optional Numba backend for the scalar Newton kernels.
+
+When numba is installed (and AMM_DISABLE_JIT is not set) the D and y
+Newton loops are compiled with njit, and float64 ufuncs are built from
+them with numba.vectorize. dsolver/ysolver dispatch to these automatically,
+so callers keep the same API. Without numba, JIT_ENABLED is False and the
+pure-Python / NumPy paths are used.
+"""
+import math
+import os
+
+try:
+    if os.environ.get("AMM_DISABLE_JIT") == "1":
+        raise ImportError("JIT disabled by AMM_DISABLE_JIT")
+    import numba
+except ImportError:
+    numba = None
+
+JIT_ENABLED = numba is not None
+BACKEND = "numba" if JIT_ENABLED else "python"
+
+
+def _newton_D_kernel(x, y, A, D0, tol, max_iter):
+    S = x + y
+    if S == 0:
+        return 0.0
+    if not (x > 0 and y > 0):
+        return math.nan
+
+    D = S if math.isnan(D0) else D0
+    Ann = A * 4
+
+    for _ in range(int(max_iter)):
+        D_P = D * D * D / (4 * x * y)
+        D_prev = D
+        numerator = (Ann * S + D_P * 2) * D
+        denominator = (Ann - 1) * D + D_P * 3
+        D = numerator / denominator
+        if abs(D - D_prev) <= tol:
+            break
+    return D
+
+
+def _newton_y_kernel(x_new, D, A, tol, max_iter):
+    if not x_new > 0:
+        return math.nan
+    Ann = A * 4
+    c = D * D * D / (4 * Ann * x_new)
+    b = x_new + D / Ann
+
+    y_prev = D
+    for _ in range(int(max_iter)):
+        y = y_prev
+        y_prev = (y * y + c) / (2 * y + b - D)
+        if abs(y - y_prev) <= tol:
+            break
+    return y_prev
+
+
+if JIT_ENABLED:
+    _newton_D_kernel = numba.njit(cache=True, error_model="numpy")(_newton_D_kernel)
+    _newton_y_kernel = numba.njit(cache=True, error_model="numpy")(_newton_y_kernel)
+
+    @numba.vectorize(["float64(float64, float64, float64, float64, float64, float64)"],
+                     cache=True)
+    def newton_D_ufunc(x, y, A, D0, tol, max_iter):
+        return _newton_D_kernel(x, y, A, D0, tol, max_iter)
+
+    @numba.vectorize(["float64(float64, float64, float64, float64, float64)"], cache=True)
+    def newton_y_ufunc(x_new, D, A, tol, max_iter):
+        return _newton_y_kernel(x_new, D, A, tol, max_iter)
+else:
+    newton_D_ufunc = None
+    newton_y_ufunc = None
+
+newton_D_kernel = _newton_D_kernel
+newton_y_kernel = _newton_y_kernel
@@ -1,11 +1,11 @@
 # classcode/plotamm.py
 import csv
 import matplotlib.pyplot as plt
-from uploader import upload_file
+from uploader import upload_or_plan
 from classcode.benchmark import BenchmarkAMM
 
 class PlotAMM(BenchmarkAMM):
-    def generate_csv_and_plot(self):
+    def generate_csv_and_plot(self, upload: bool = True):
         rows = self.run_test()
 
         # Save CSV
@@ -15,8 +15,7 @@ class PlotAMM(BenchmarkAMM):
             writer.writerows(rows)
         print(f"✅ CSV saved locally at {self.csv_file}")
 
-        csv_result = upload_file(self.csv_file, self.csv_remote)
-        print("✅ CSV upload result:", csv_result)
+        csv_result = upload_or_plan(self.csv_file, self.csv_remote, upload, "CSV upload")
 
         # Plot
         plt.figure(figsize=(8, 6))
@@ -33,8 +32,7 @@ class PlotAMM(BenchmarkAMM):
         plt.savefig(self.plot_file)
         print(f"✅ Plot saved locally at {self.plot_file}")
 
-        plot_result = upload_file(self.plot_file, self.plot_remote)
-        print("✅ Plot upload result:", plot_result)
+        plot_result = upload_or_plan(self.plot_file, self.plot_remote, upload, "Plot upload")
 
         return {"csv": csv_result, "plot": plot_result}
 
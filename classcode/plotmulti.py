@@ -1,7 +1,7 @@
 # classcode/plotmulti.py
 import matplotlib.pyplot as plt
-from uploader import upload_file
-from classcode.benchmark import BenchmarkAMM
+from uploader import upload_or_plan
+from classcode.resultframe import result_frame
 
 class PlotMultiAMM:
     """
@@ -16,26 +16,24 @@ class PlotMultiAMM:
         self.plot_file = plot_file
         self.plot_remote = plot_remote
 
-    def generate_plot(self):
+    def generate_plot(self, upload: bool = True):
         plt.figure(figsize=(8, 6))
 
-        # loop over A values and reuse BenchmarkAMM
+        # loop over A values; each curve comes from the shared result frame
         for A in self.A_list:
-            benchmark = BenchmarkAMM(self.xb, self.yb, A, self.n)
-            benchmark.run_test()
-            plt.plot(benchmark.x_values, benchmark.y_values, label=f"A={A}")
+            frame = result_frame(self.xb, self.yb, A, self.n)
+            y_values = frame.y
+            plt.plot(frame.x, y_values, label=f"A={A}")
 
         # straight-line reference
         #plt.plot(benchmark.x_values,
         #         self.xb + self.yb - benchmark.x_values,
         #         "k--", label="y = L - x")
 
-        rows = benchmark.run_test()
-
         # keep only positive y values
         x_vals = []
         y_vals = []
-        for x, y, _ in rows:
+        for x, y in zip(frame.x, y_values):
             if y <= 0:
                 break
             x_vals.append(x)
@@ -53,7 +51,5 @@ class PlotMultiAMM:
         plt.savefig(self.plot_file)
         print(f"✅ Multi-plot saved locally at {self.plot_file}")
 
-        result = upload_file(self.plot_file, self.plot_remote)
-        print("✅ Upload result:", result)
-        return result
+        return upload_or_plan(self.plot_file, self.plot_remote, upload)
 
@@ -1,7 +1,7 @@
 # classcode/plotmulti_price.py
 import matplotlib.pyplot as plt
-from uploader import upload_file
-from classcode.calcprice import CalcPrice
+from uploader import upload_or_plan
+from classcode.resultframe import result_frame
 
 class PlotMultiPrice:
     """
@@ -17,27 +17,16 @@ class PlotMultiPrice:
         self.plot_file = plot_file
         self.plot_remote = plot_remote
 
-    def generate_plot(self):
+    def generate_plot(self, upload: bool = True):
         plt.figure(figsize=(8, 6))
 
         for A in self.A_list:
-            price_calc = CalcPrice(
-                xb=self.xb,
-                yb=self.yb,
-                A=A,
-                n=self.n,
-                csv_file=f"/tmp/stableswap_price_a{A}.csv",
-                csv_remote=f"stableswap_price_a{A}.csv",
-                plot_file=f"/tmp/stableswap_price_a{A}.png",
-                plot_remote=f"stableswap_price_a{A}.png",
-            )
+            # x, y and the closed-form price from the shared result frame
+            frame = result_frame(self.xb, self.yb, A, self.n)
+            D = frame.D
 
-            rows = price_calc.run_test()
-            prices = [price_calc.compute_price(x, y) for (x, y, _) in rows]
-
-            # plt.plot(price_calc.x_values, prices, label=f"A={A}")
-            D = price_calc.pool.D
-            plt.plot(price_calc.x_values, prices, label=f"A={A}, D={D:.2e}")
+            # plt.plot(frame.x, frame.price, label=f"A={A}")
+            plt.plot(frame.x, frame.price, label=f"A={A}, D={D:.2e}")
 
         plt.axhline(1.0, color="k", linestyle="--", label="Balanced price p=1")
         plt.title(f"StableSwap Price Curves for A={min(self.A_list)}–{max(self.A_list)}")
@@ -50,7 +39,5 @@ class PlotMultiPrice:
         plt.savefig(self.plot_file)
         print(f"✅ Multi-price plot saved locally at {self.plot_file}")
 
-        result = upload_file(self.plot_file, self.plot_remote)
-        print("✅ Upload result:", result)
-        return result
+        return upload_or_plan(self.plot_file, self.plot_remote, upload)
 
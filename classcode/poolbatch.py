@@ -0,0 +1,90 @@
+# classcode/poolbatch.py
+import numpy as np
+from .ysolver import SOLVERS, solve_y
+from .dsolver import D_SOLVERS, compute_D, newton_D_batch
+from .pricing import marginal_price
+
+
+class PoolBatch:
+    """
+    Struct-of-arrays version of CurveStableSwap2Pool: many independent
+    2-pools whose x, y, A, fee and D live in contiguous float arrays.
+    Every method works on all pools in one vectorized call; per-pool
+    amounts may be passed as a scalar (same for all) or an array.
+    """
+
+    def __init__(self, balance_x, balance_y, A=100, fee=0.0004,
+                 solver: str = "newton", d_solver: str = "newton"):
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown solver '{solver}', expected one of {SOLVERS}")
+        if d_solver not in D_SOLVERS:
+            raise ValueError(f"Unknown D solver '{d_solver}', expected one of {D_SOLVERS}")
+        x, y, A, fee = np.broadcast_arrays(
+            np.atleast_1d(np.asarray(balance_x, dtype=float)),
+            np.atleast_1d(np.asarray(balance_y, dtype=float)),
+            np.atleast_1d(np.asarray(A, dtype=float)),
+            np.atleast_1d(np.asarray(fee, dtype=float)),
+        )
+        self.x = np.ascontiguousarray(x, dtype=float)
+        self.y = np.ascontiguousarray(y, dtype=float)
+        self.A = np.ascontiguousarray(A, dtype=float)
+        self.fee = np.ascontiguousarray(fee, dtype=float)
+        self.solver = solver
+        self.d_solver = d_solver
+        self.D = compute_D(self.x, self.y, self.A, self.d_solver)
+
+    @classmethod
+    def from_pools(cls, pools, solver: str = "newton", d_solver: str = "newton"):
+        """Build a batch from CurveStableSwap2Pool-like objects."""
+        return cls(
+            [p.x for p in pools], [p.y for p in pools],
+            [p.A for p in pools], [p.fee for p in pools],
+            solver=solver, d_solver=d_solver,
+        )
+
+    def __len__(self) -> int:
+        return self.x.size
+
+    def _calculate_D(self) -> np.ndarray:
+        """Recompute D for every pool, warm-starting Newton from the current D."""
+        if self.d_solver == "cardano":
+            return compute_D(self.x, self.y, self.A)
+        return newton_D_batch(self.x, self.y, self.A, D0=self.D)
+
+    def _get_y(self, x_new) -> np.ndarray:
+        return solve_y(np.asarray(x_new, dtype=float), self.D, self.A, self.solver)
+
+    def get_dy(self, dx) -> np.ndarray:
+        """Output y for input dx in every pool (after fee)"""
+        y_new = self._get_y(self.x + dx)
+        return np.maximum(0, (self.y - y_new) * (1 - self.fee))
+
+    def get_dx(self, dy) -> np.ndarray:
+        """Required input x for output dy in every pool"""
+        y_new = self.y - np.asarray(dy, dtype=float) / (1 - self.fee)
+        x_new = self._get_y(y_new)
+        return np.maximum(0, x_new - self.x)
+
+    def swap_x_for_y(self, dx) -> np.ndarray:
+        """Execute swap in every pool: input dx, receive dy"""
+        dy = self.get_dy(dx)
+
+        self.x += dx
+        self.y -= dy
+        self.D = self._calculate_D()
+
+        return dy
+
+    def get_spot_price(self) -> np.ndarray:
+        """Instantaneous price dy/dx for every pool (analytic marginal price, after fee)"""
+        return marginal_price(self.x, self.y, self.D, self.A) * (1 - self.fee)
+
+    def get_price_impact(self, dx) -> np.ndarray:
+        """Price impact percentage of dx for every pool (0 where dx == 0)"""
+        dx = np.asarray(dx, dtype=float)
+        dy = self.get_dy(dx)
+        spot_price = self.get_spot_price()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            average_price = dy / dx
+            impact = np.abs(1 - average_price / spot_price) * 100
+        return np.where((spot_price > 0) & (dx != 0), impact, 0.0)
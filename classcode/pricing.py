@@ -0,0 +1,18 @@
+# classcode/pricing.py
+from .derivatives import dy_dx, d2y_dx2
+
+
+def marginal_price(x, y, D, A):
+    """
+    Closed-form marginal price p = -dy/dx on the n=2 invariant curve
+    (same expression as CalcPrice.compute_price); works on arrays.
+    """
+    return -dy_dx(x, y, D, A)
+
+
+def marginal_price_slope(x, y, D, A):
+    """
+    Closed-form dp/dx along the curve, where p = -dy/dx is the marginal
+    price above: dp/dx = -d²y/dx².
+    """
+    return -d2y_dx2(x, y, D, A)
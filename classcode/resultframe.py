@@ -0,0 +1,82 @@
+# classcode/resultframe.py
+from functools import cached_property, lru_cache
+
+import numpy as np
+from .ystate import YState
+from .ysolver import solve_y
+from .pricing import marginal_price, marginal_price_slope
+
+
+class ResultFrame:
+    """
+    Columnar results for one curve on the BenchmarkAMM grid: x, y,
+    delta (invariant residual), price and dpdx as float arrays. D is
+    computed once; each column is computed on first access and kept.
+    Use result_frame() to share one frame per parameter set.
+    """
+
+    COLUMNS = ("x", "y", "delta", "price", "dpdx")
+
+    def __init__(self, xb=1_000_000, yb=1_000_000, A=100, n=200,
+                 solver: str = "newton", d_solver: str = "newton"):
+        self.pool = YState(xb, yb, A, solver, d_solver)
+        self.A = self.pool.A
+        self.D = self.pool.D
+        self.x = np.linspace(xb / 10, xb * 4, n)
+
+    @cached_property
+    def y(self) -> np.ndarray:
+        return np.asarray(solve_y(self.x, self.D, self.A, self.pool.solver), dtype=float)
+
+    @cached_property
+    def delta(self) -> np.ndarray:
+        """Same expression as CheckStates.delta"""
+        x, y, A, D = self.x, self.y, self.A, self.D
+        lhs = 4 * A * (x + y) + D
+        rhs = 4 * A * D + D**3 / (4 * x * y)
+        return lhs - rhs
+
+    @cached_property
+    def price(self) -> np.ndarray:
+        return marginal_price(self.x, self.y, self.D, self.A)
+
+    @cached_property
+    def dpdx(self) -> np.ndarray:
+        return marginal_price_slope(self.x, self.y, self.D, self.A)
+
+    def rows(self, *columns) -> list:
+        """[[x, y, delta], ...] by default, or the named columns, as Python floats"""
+        columns = columns or ("x", "y", "delta")
+        return [list(row) for row in zip(*(getattr(self, c).tolist() for c in columns))]
+
+
+@lru_cache(maxsize=64)
+def _cached_frame(xb, yb, A, n, solver, d_solver) -> ResultFrame:
+    return ResultFrame(xb, yb, A, n, solver, d_solver)
+
+
+# Frames computed in another process and handed over (see preload_frames)
+_preloaded = {}
+
+
+def frame_key(xb=1_000_000, yb=1_000_000, A=100, n=200,
+              solver: str = "newton", d_solver: str = "newton") -> tuple:
+    """The normalized parameter set a frame is memoized under"""
+    return (float(xb), float(yb), int(A), int(n), solver, d_solver)
+
+
+def result_frame(xb=1_000_000, yb=1_000_000, A=100, n=200,
+                 solver: str = "newton", d_solver: str = "newton") -> ResultFrame:
+    """Memoized ResultFrame per parameter set (however the arguments are passed)"""
+    key = frame_key(xb, yb, A, n, solver, d_solver)
+    frame = _preloaded.get(key)
+    return frame if frame is not None else _cached_frame(*key)
+
+
+def preload_frames(frames: dict):
+    """
+    Serve {frame_key: ResultFrame} from result_frame in this process, e.g.
+    as a process-pool initializer, so workers reuse frames solved once in
+    the parent (computed columns travel with the pickled frame).
+    """
+    _preloaded.update(frames)
@@ -0,0 +1,69 @@
+# classcode/sampling.py
+from collections import namedtuple
+
+import numpy as np
+
+# x grid, f on it (same leading shape as f's output), number of points
+# f was evaluated at (including midpoints that were checked but not kept)
+# and the largest midpoint error measured on an interval left unsplit
+Sample = namedtuple("Sample", "x y calls max_error")
+
+
+def adaptive_grid(f, lo: float, hi: float, tol: float, max_points: int = 1000,
+                  n_init: int = 17) -> Sample:
+    """
+    Sample f on [lo, hi] so that straight lines between samples stay
+    within tol of f. f maps an x array to an array of f values, or to a
+    (curve × point) array, in which case one grid is built that is good
+    enough for every curve.
+
+    Starting from n_init uniform points, each pending interval is checked
+    at its midpoint, where the linear-interpolation error
+    |f(mid) - (f(a) + f(b)) / 2| is measured (max over curves). Intervals
+    above tol are split at that midpoint, which becomes a sample point, and
+    both halves are checked next round; the rest are final. Once the
+    grid would exceed max_points, only the worst intervals are split
+    (and max_error then shows how far from tol the result stayed).
+    NaN values (infeasible points) never trigger refinement.
+    """
+    x = np.linspace(lo, hi, max(2, min(n_init, max_points)))
+    y = np.asarray(f(x), dtype=float)
+    single = y.ndim == 1
+    Y = np.atleast_2d(y)
+    calls = x.size
+    pending = np.ones(x.size - 1, dtype=bool)
+    max_error = 0.0
+
+    while pending.any():
+        idx = np.flatnonzero(pending)
+        mid = (x[idx] + x[idx + 1]) / 2
+        Ym = np.atleast_2d(np.asarray(f(mid), dtype=float))
+        calls += mid.size
+        err = np.abs(Ym - (Y[:, idx] + Y[:, idx + 1]) / 2)
+        err = np.max(np.where(np.isnan(err), 0.0, err), axis=0)
+
+        split = err > tol
+        budget = max_points - x.size
+        if np.count_nonzero(split) > budget:
+            worst = np.argsort(err)[::-1][:max(budget, 0)]
+            keep = np.zeros_like(split)
+            keep[worst] = True
+            max_error = max(max_error, float(err[~keep].max()))
+            split = keep
+        else:
+            max_error = max(max_error, float(err[~split].max(initial=0.0)))
+
+        if not split.any():
+            break
+        chosen = idx[split]
+        new_pending = np.zeros(pending.size, dtype=bool)
+        new_pending[chosen] = True
+        # Each split interval becomes two pending halves
+        pending = np.repeat(new_pending, np.where(new_pending, 2, 1))
+        x = np.insert(x, chosen + 1, mid[split])
+        Y = np.insert(Y, chosen + 1, Ym[:, split], axis=1)
+        if x.size >= max_points:
+            # Budget spent; the newest halves are left unchecked
+            break
+
+    return Sample(x, Y[0] if single else Y, calls, max_error)
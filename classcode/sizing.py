@@ -0,0 +1,103 @@
+# classcode/sizing.py
+import numpy as np
+from .ysolver import quadratic_y
+from .pricing import marginal_price, marginal_price_slope
+
+
+def _safeguarded_newton(g, lo, hi, rtol: float = 1e-12, max_iter: int = 100):
+    """
+    Element-wise root of an increasing function g on brackets [lo, hi]
+    (g(lo) <= 0 <= g(hi)). g(z) returns (value, derivative). A Newton
+    step is taken when it stays strictly inside the bracket, otherwise
+    the bracket is bisected; the bracket shrinks on every evaluation.
+    """
+    z = (lo + hi) / 2
+    active = np.flatnonzero(np.isfinite(z))
+    for _ in range(max_iter):
+        if active.size == 0:
+            break
+        za, la, ha = z[active], lo[active], hi[active]
+        value, slope = g(za, active)
+        below = value < 0
+        la = np.where(below, za, la)
+        ha = np.where(below, ha, za)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = za - value / slope
+        inside = np.isfinite(step) & (step > la) & (step < ha)
+        z_next = np.where(inside, step, (la + ha) / 2)
+        z_next = np.where(value == 0, za, z_next)
+        lo[active], hi[active], z[active] = la, ha, z_next
+        done = (np.abs(z_next - za) <= rtol * np.abs(za)) | (value == 0)
+        active = active[~done]
+    return z
+
+
+def _expand_bracket(g, start, max_doublings: int = 64):
+    """Double hi from start until g(hi) >= 0 (element-wise)."""
+    hi = start.copy()
+    pending = np.flatnonzero(np.isfinite(hi))
+    for _ in range(max_doublings):
+        if pending.size == 0:
+            break
+        value, _ = g(hi[pending], pending)
+        pending = pending[value < 0]
+        hi[pending] *= 2
+    hi[pending] = np.nan
+    return hi
+
+
+def dx_for_price(x0, D, A, p_target) -> np.ndarray:
+    """
+    Input dx that moves the marginal price (before fee) from its value at
+    x0 down to p_target. Targets at or above the current price give 0,
+    non-positive targets (never reached) give NaN.
+    """
+    arrays = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (x0, D, A, p_target)))
+    shape = arrays[0].shape
+    x0, D, A, p_target = (a.ravel() for a in arrays)
+
+    def g(x, idx):
+        y = quadratic_y(x, D[idx], A[idx])
+        value = p_target[idx] - marginal_price(x, y, D[idx], A[idx])
+        return value, -marginal_price_slope(x, y, D[idx], A[idx])
+
+    p0 = marginal_price(x0, quadratic_y(x0, D, A), D, A)
+    solvable = (p_target > 0) & (p_target < p0)
+    start = np.where(solvable, x0, np.nan)
+
+    hi = _expand_bracket(g, start)
+    x = _safeguarded_newton(g, x0.copy(), hi)
+
+    dx = np.where(p_target >= p0, 0.0, x - x0)
+    dx[~(p_target > 0)] = np.nan
+    return dx.reshape(shape)
+
+
+def dx_for_impact(x0, y0, D, A, bps) -> np.ndarray:
+    """
+    Largest input dx whose price impact, 1 - (dy/dx) / spot, stays within
+    bps basis points (fee excluded, as in CurveStableSwap2Pool.price_impact).
+    Impact never reaches 100%, so bps >= 10,000 gives NaN.
+    """
+    arrays = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (x0, y0, D, A, bps)))
+    shape = arrays[0].shape
+    x0, y0, D, A, bps = (a.ravel() for a in arrays)
+    target = bps / 10_000
+    spot = marginal_price(x0, y0, D, A)
+
+    def g(dx, idx):
+        x = x0[idx] + dx
+        y = quadratic_y(x, D[idx], A[idx])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            average_price = (y0[idx] - y) / dx
+            impact = 1 - average_price / spot[idx]
+            slope = (average_price - marginal_price(x, y, D[idx], A[idx])) / (dx * spot[idx])
+        return impact - target[idx], slope
+
+    start = np.where((target > 0) & (target < 1), x0, np.nan)
+    hi = _expand_bracket(g, start)
+    dx = _safeguarded_newton(g, np.zeros_like(x0), hi)
+
+    dx[target <= 0] = 0.0
+    dx[~(target < 1)] = np.nan
+    return dx.reshape(shape)
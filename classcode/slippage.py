@@ -0,0 +1,42 @@
+# classcode/slippage.py
+import numpy as np
+from .pricing import marginal_price
+
+
+def slippage(x, Y, price, scaling=1):
+    """
+    Step slippage for many curves sampled on one grid x:
+        (Δy - Δx * price) / scaling
+    per step i -> i+1, with price taken at the left point. Y and price
+    are (curve × point) arrays (a single curve may be 1-D); the result is
+    (curve × step). Infeasible points (NaN y, x <= 0) give NaN.
+    """
+    x = np.asarray(x, dtype=float)
+    Y = np.atleast_2d(np.asarray(Y, dtype=float))
+    price = np.broadcast_to(np.asarray(price, dtype=float), Y.shape)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dx = np.diff(x)
+        out = (np.diff(Y, axis=1) - dx * price[:, :-1]) / scaling
+    out[~np.isfinite(out)] = np.nan
+    return out
+
+
+def finite_difference_slippage(x, Y, scaling=1):
+    """slippage() against the reference price y/x (the plot_invariant_curve definition)"""
+    x = np.asarray(x, dtype=float)
+    Y = np.atleast_2d(np.asarray(Y, dtype=float))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return slippage(x, Y, Y / x, scaling)
+
+
+def analytic_slippage(x, Y, D, A, scaling=1):
+    """
+    slippage() against the closed-form marginal price at each point.
+    D and A give one value per curve; A = 0 is the constant-product
+    curve, whose marginal price is exactly y/x for any D > 0.
+    """
+    x = np.asarray(x, dtype=float)
+    Y = np.atleast_2d(np.asarray(Y, dtype=float))
+    D = np.asarray(D, dtype=float).reshape(-1, 1)
+    A = np.asarray(A, dtype=float).reshape(-1, 1)
+    return slippage(x, Y, marginal_price(x, Y, D, A), scaling)
@@ -0,0 +1,111 @@
+# classcode/surrogate.py
+import numpy as np
+from numpy.polynomial import chebyshev as C
+from .ysolver import newton_y_batch
+
+
+class CurveSurrogate:
+    """
+    Piecewise Chebyshev surrogate of y(x) for one (A, D) curve on
+    [x_min, x_max]. The domain is split into equal segments (doubling the
+    count until every segment is within tol, absolute in units of y, on a
+    dense check grid against the Newton reference); seg_error[i] is the
+    measured maximum error of segment i. Equal segments make the lookup
+    plain arithmetic, so evaluation is O(1) per point and vectorizes.
+
+    The curve is homogeneous in (x, y, D), y(x; A, D') = y(x k; A, D) / k
+    with k = D / D', so the surrogate also serves any other D of the same
+    A: evaluate at x * scale(D') and divide by it (the domain moves with k).
+    """
+
+    def __init__(self, A: float, D: float, x_min: float, x_max: float,
+                 degree: int = 8, tol: float = 1e-6, max_segments: int = 1 << 16):
+        self.A = A
+        self.D = D
+        self.x_min = float(x_min)
+        self.x_max = float(x_max)
+        self.degree = degree
+        self.tol = tol
+
+        nodes = np.cos(np.pi * (np.arange(degree + 1) + 0.5) / (degree + 1))
+        check = np.linspace(-1, 1, 4 * degree + 1)
+
+        n_seg = 1
+        while True:
+            edges = np.linspace(self.x_min, self.x_max, n_seg + 1)
+            mid = ((edges[:-1] + edges[1:]) / 2)[:, None]
+            half = ((edges[1:] - edges[:-1]) / 2)[:, None]
+            coef = C.chebfit(nodes, self._reference(mid + half * nodes).T, degree)
+            fitted = C.chebval(check, coef)
+            err = np.max(np.abs(fitted - self._reference(mid + half * check)), axis=1)
+            if err.max() <= tol or 2 * n_seg > max_segments:
+                break
+            n_seg *= 2
+
+        self.n_segments = n_seg
+        self.coef = np.ascontiguousarray(coef)      # (degree + 1, n_segments)
+        self.seg_error = err
+        self._scale = n_seg / (self.x_max - self.x_min)
+        self._coef_rows = coef.T.tolist()           # for the scalar path
+
+    def _reference(self, x):
+        return newton_y_batch(x, self.D, self.A, tol=1e-9 * self.D)
+
+    @property
+    def max_error(self) -> float:
+        return float(self.seg_error.max())
+
+    def matches(self, A: float) -> bool:
+        """True if built for this A; a new D (e.g. after a swap) only needs scale()."""
+        return self.A == A
+
+    def scale(self, D: float) -> float:
+        """k = self.D / D: y on the D curve at x is self(x * k) / k."""
+        return self.D / D
+
+    def covers(self, x):
+        return (x >= self.x_min) & (x <= self.x_max)
+
+    def rebuild(self, A: float, D: float) -> "CurveSurrogate":
+        """Rebuild hook: same domain and accuracy for a new (A, D)."""
+        return CurveSurrogate(A, D, self.x_min, self.x_max, self.degree, self.tol)
+
+    def _segment(self, x):
+        u = (x - self.x_min) * self._scale
+        return u, np.clip(np.floor(u), 0, self.n_segments - 1)
+
+    def eval_scalar(self, x: float) -> float:
+        """Pure-Python Clenshaw for a single in-domain x (no NumPy overhead)"""
+        u = (x - self.x_min) * self._scale
+        i = min(max(int(u), 0), self.n_segments - 1)
+        t = 2 * (u - i) - 1
+        c = self._coef_rows[i]
+        b1 = b2 = 0.0
+        for k in range(self.degree, 0, -1):
+            b1, b2 = 2 * t * b1 - b2 + c[k], b1
+        return t * b1 - b2 + c[0]
+
+    def __call__(self, x):
+        """y(x); points outside [x_min, x_max] come back as NaN."""
+        if np.ndim(x) == 0:
+            return self.eval_scalar(float(x)) if self.covers(x) else float("nan")
+        x = np.asarray(x, dtype=float)
+        u, i = self._segment(x)
+        i = i.astype(np.intp)
+        t = 2 * (u - i) - 1
+        t2 = 2 * t
+
+        # Clenshaw recurrence across all points at once
+        b1 = np.take(self.coef[self.degree], i)
+        b2 = np.zeros_like(t)
+        for k in range(self.degree - 1, 0, -1):
+            b_next = t2 * b1
+            b_next -= b2
+            b_next += np.take(self.coef[k], i)
+            b1, b2 = b_next, b1
+        y = t * b1
+        y -= b2
+        y += np.take(self.coef[0], i)
+
+        y[~self.covers(x)] = np.nan
+        return y
@@ -3,16 +3,18 @@ from .dstate import DState
 from .ystated import YStateD   # <-- use the new class
 
 class SwapDx:
-    def __init__(self, xb: float, yb: float, A: int):
-        self.pool = DState(xb, yb, A)
+    def __init__(self, xb: float, yb: float, A: int, solver: str = "newton",
+                 d_solver: str = "newton"):
+        self.pool = DState(xb, yb, A, solver, d_solver)
         self.A = A
+        self.solver = solver
 
     def trade(self, dx: float):
         x0, y0, D = self.pool.x, self.pool.y, self.pool.D
         x_new = x0 + dx
 
         # Use YStateD with explicit D
-        ystate = YStateD(x0, y0, self.A)
+        ystate = YStateD(x0, y0, self.A, self.solver)
         y_new = ystate.get_y(x_new, D)
 
         dy = y0 - y_new
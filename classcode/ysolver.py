@@ -0,0 +1,105 @@
+# classcode/ysolver.py
+import numpy as np
+from .jit import JIT_ENABLED, newton_y_kernel, newton_y_ufunc
+
+
+def newton_y(x_new: float, D: float, A: float, tol: float = 1, max_iter: int = 255) -> float:
+    """Scalar Newton iteration for y given x, D and A (n=2); NaN for x <= 0."""
+    if JIT_ENABLED:
+        return newton_y_kernel(float(x_new), float(D), float(A), float(tol), max_iter)
+    if not x_new > 0:
+        return np.nan
+
+    Ann = A * 4
+    c = D * D * D / (4 * Ann * x_new)
+    b = x_new + D / Ann
+
+    y_prev = D
+    for _ in range(max_iter):
+        y = y_prev
+        y_prev = (y * y + c) / (2 * y + b - D)
+        if abs(y - y_prev) <= tol:
+            break
+    return y_prev
+
+
+def newton_y_batch(x_new, D, A, tol: float = 1, max_iter: int = 255) -> np.ndarray:
+    """
+    Vectorized Newton iteration for y over an array of x values.
+    D and A may be scalars or arrays broadcastable against x_new.
+    Each element stops updating once it has converged; points with
+    x <= 0 have no solution and come back as NaN.
+    """
+    if JIT_ENABLED:
+        return np.asarray(newton_y_ufunc(x_new, D, A, tol, max_iter), dtype=float)
+
+    x_new, D, A = np.broadcast_arrays(
+        np.asarray(x_new, dtype=float),
+        np.asarray(D, dtype=float),
+        np.asarray(A, dtype=float),
+    )
+    shape = x_new.shape
+    x_new, D, A = x_new.ravel(), D.ravel(), A.ravel()
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        Ann = A * 4
+        c = D * D * D / (4 * Ann * x_new)
+        b = x_new + D / Ann
+
+        y = D.copy()
+        active = np.flatnonzero(np.isfinite(c) & (x_new > 0))
+        for _ in range(max_iter):
+            if active.size == 0:
+                break
+            ya = y[active]
+            y_next = (ya * ya + c[active]) / (2 * ya + b[active] - D[active])
+            y[active] = y_next
+            active = active[np.abs(ya - y_next) > tol]
+
+    y[~(x_new > 0)] = np.nan
+    return y.reshape(shape)
+
+
+def quadratic_y(x_new, D, A) -> np.ndarray:
+    """
+    Closed-form y for n=2: y is the positive root of
+        y^2 + (b - D)*y - c = 0,  b = x + D/(4A),  c = D^3 / (16*A*x)
+    Uses the cancellation-free root form for either sign of (b - D) and
+    falls back to Newton for elements where the discriminant is not usable.
+    """
+    x_new, D, A = np.broadcast_arrays(
+        np.asarray(x_new, dtype=float),
+        np.asarray(D, dtype=float),
+        np.asarray(A, dtype=float),
+    )
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        Ann = A * 4
+        c = D * D * D / (4 * Ann * x_new)
+        B = x_new + D / Ann - D
+        sqrt_disc = np.sqrt(B * B + 4 * c)
+        y = np.where(B >= 0, 2 * c / (B + sqrt_disc), (sqrt_disc - B) / 2)
+
+    bad = ~(np.isfinite(y) & (y > 0)) & (x_new > 0)
+    if bad.any():
+        y[bad] = newton_y_batch(x_new[bad], D[bad], A[bad])
+    y[~(x_new > 0)] = np.nan
+    return y
+
+
+SOLVERS = ("newton", "quadratic")
+
+
+def solve_y(x_new, D, A, solver: str = "newton"):
+    """
+    Solve y for x_new using the selected engine.
+    Scalars in give a float back; arrays in give an array back.
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver '{solver}', expected one of {SOLVERS}")
+    if np.ndim(x_new) == 0 and np.ndim(D) == 0 and np.ndim(A) == 0:
+        if solver == "newton":
+            return newton_y(x_new, D, A)
+        return float(quadratic_y(x_new, D, A))
+    if solver == "newton":
+        return newton_y_batch(x_new, D, A)
+    return quadratic_y(x_new, D, A)
@@ -1,13 +1,52 @@
 # generate_csv.py
+"""
+Build the CSV/plot artifacts of the classcode generators and upload them.
+
+Each job declares its source inputs, the local files it writes and the
+jobs it must run after. A job is skipped when its outputs exist, are
+newer than its inputs and were built with the same parameters (recorded
+in a small state file). Jobs that are ready run in parallel on a process
+pool, seeded with the curves they read, which are solved once up front;
+every upload is done at the end in one concurrent batch.
+
+    python generate_csv.py                  # one worker per core
+    python generate_csv.py --jobs 1         # serial, in this process
+    python generate_csv.py --force --no-upload
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+import traceback
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
 from classcode.plotamm import PlotAMM
 from classcode.plotmulti import PlotMultiAMM
 from classcode.calcprice import CalcPrice
 from classcode.calcprice_derivative import CalcPriceDerivative
 
 from classcode.plotmulti_price import PlotMultiPrice
-def main():
+from classcode.resultframe import ResultFrame, frame_key, preload_frames, result_frame
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = os.environ.get("GENERATE_CSV_STATE", "/tmp/generate_csv_state.json")
+
+# Sources every curve job is computed from
+CORE_INPUTS = [
+    "classcode/benchmark.py", "classcode/resultframe.py", "classcode/ystate.py",
+    "classcode/dstate.py", "classcode/ysolver.py", "classcode/dsolver.py",
+    "classcode/jit.py", "classcode/pricing.py", "classcode/derivatives.py",
+    "classcode/checkstates.py",
+]
+
+Job = namedtuple("Job", "name cls method kwargs inputs after")
+
+JOBS = [
     # --- Single A example ---
-    amm = PlotAMM(
+    Job("single_a", PlotAMM, "generate_csv_and_plot", dict(
         xb=1_000_000,
         yb=1_000_000,
         A=1,
@@ -16,22 +55,20 @@ def main():
         csv_remote="teststable_a1.csv",
         plot_file="/tmp/teststable_a1.png",
         plot_remote="teststable_a1.png",
-    )
-    amm.generate_csv_and_plot()
+    ), CORE_INPUTS + ["classcode/plotamm.py"], ()),
 
     # --- Multi A example ---
-    multi = PlotMultiAMM(
+    Job("multi_a", PlotMultiAMM, "generate_plot", dict(
         xb=1_000_000,
         yb=1_000_000,
         A_list=[1, 10, 100, 1000],
         n=200,
         plot_file="/tmp/teststable_a1-1000.png",
         plot_remote="teststable_a1-1000.png",
-    )
-    multi.generate_plot()
+    ), CORE_INPUTS + ["classcode/plotmulti.py"], ()),
 
     # --- Price example ---
-    price = CalcPrice(
+    Job("price", CalcPrice, "generate_csv_with_price", dict(
         xb=1_000_000,
         yb=1_000_000,
         A=1,
@@ -40,10 +77,9 @@ def main():
         csv_remote="teststable_price_a1.csv",
         plot_file="/tmp/teststable_price_a1.png",
         plot_remote="teststable_price_a1.png",
-    )
-    price.generate_csv_with_price()
+    ), CORE_INPUTS + ["classcode/plotamm.py", "classcode/calcprice.py"], ()),
 
-    derivative = CalcPriceDerivative(
+    Job("derivative", CalcPriceDerivative, "generate_csv_with_derivative_price", dict(
         xb=1_000_000,
         yb=1_000_000,
         A=1,
@@ -52,23 +88,214 @@ def main():
         csv_remote="teststable_derivative_price_a1.csv",
         plot_file="/tmp/teststable_derivative_price_a1.png",
         plot_remote="teststable_derivative_price_a1.png",
-    )
-    derivative.generate_csv_with_derivative_price()
-
+    ), CORE_INPUTS + ["classcode/plotamm.py", "classcode/calcprice_derivative.py"], ()),
 
     # --- Multi Price example ---
-    multi_price = PlotMultiPrice(
+    Job("multi_price", PlotMultiPrice, "generate_plot", dict(
         xb=1_000_000,
         yb=1_000_000,
         A_list=[1, 10, 100, 1000],
         n=200,
         plot_file="/tmp/teststable_multi_price.png",
         plot_remote="teststable_multi_price.png",
-    )
-    multi_price.generate_plot()
+    ), CORE_INPUTS + ["classcode/plotmulti_price.py"], ()),
+]
 
 
+def outputs(job):
+    """(local_file, remote_name) pairs a job writes"""
+    pairs = []
+    for kind in ("csv", "plot"):
+        if f"{kind}_file" in job.kwargs:
+            pairs.append((job.kwargs[f"{kind}_file"], job.kwargs[f"{kind}_remote"]))
+    return pairs
+
+
+def stamp(job) -> str:
+    """Identifies how a job's outputs were built (generator and parameters)"""
+    payload = json.dumps({"cls": job.cls.__name__, "method": job.method, "kwargs": job.kwargs},
+                         sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def up_to_date(job, state) -> bool:
+    record = state.get(job.name)
+    if record is None or record.get("stamp") != stamp(job):
+        return False
+    files = [local for local, _ in outputs(job)]
+    if not all(os.path.exists(f) for f in files):
+        return False
+    newest_input = max(os.path.getmtime(os.path.join(HERE, f)) for f in job.inputs)
+    return min(os.path.getmtime(f) for f in files) >= newest_input
+
+
+def load_state(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(path, state):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+def frame_keys(job):
+    """result_frame parameter sets a job reads (one per A)"""
+    kw = job.kwargs
+    return [frame_key(kw["xb"], kw["yb"], A, kw["n"]) for A in kw.get("A_list", [kw.get("A")])]
 
-if __name__ == "__main__":
-    main()
 
+def solve_frames(jobs) -> dict:
+    """
+    Solve every curve the jobs share once, here, with all columns filled,
+    so pool workers can be seeded with them instead of each re-solving.
+    """
+    frames = {}
+    for job in jobs:
+        for key in frame_keys(job):
+            if key not in frames:
+                frame = result_frame(*key)
+                for column in ResultFrame.COLUMNS:
+                    getattr(frame, column)
+                frames[key] = frame
+    return frames
+
+
+def run_job(name):
+    """Worker entry point: build one job's files without uploading them"""
+    job = next(j for j in JOBS if j.name == name)
+    start = time.perf_counter()
+    getattr(job.cls(**job.kwargs), job.method)(upload=False)
+    return time.perf_counter() - start
+
+
+def schedule(jobs, n_workers, frames=None):
+    """
+    Run jobs, each once all of its `after` jobs have succeeded. Pool
+    workers start with frames (solve_frames output) preloaded. Returns
+    {name: seconds} for completed jobs and {name: error} for failed or
+    blocked ones.
+    """
+    done, failed = {}, {}
+    pending = {job.name: job for job in jobs}
+    names = set(pending)
+
+    def ready():
+        out = []
+        for name, job in list(pending.items()):
+            deps = [d for d in job.after if d in names]
+            if any(d in failed for d in deps):
+                failed[name] = "dependency failed"
+                del pending[name]
+            elif all(d in done for d in deps):
+                out.append(name)
+        return out
+
+    if n_workers <= 1:
+        while pending:
+            batch = ready()
+            if not batch:
+                break
+            for name in batch:
+                del pending[name]
+                try:
+                    done[name] = run_job(name)
+                except Exception as e:
+                    traceback.print_exc()
+                    failed[name] = f"{type(e).__name__}: {e}"
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=preload_frames,
+                                 initargs=(frames or {},)) as pool:
+            running = {}
+            while pending or running:
+                for name in ready():
+                    del pending[name]
+                    running[pool.submit(run_job, name)] = name
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        done[name] = future.result()
+                    except Exception as e:
+                        failed[name] = f"{type(e).__name__}: {e}"
+
+    for name in pending:
+        failed[name] = "dependency cycle"
+    return done, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (1 = run serially in this process)")
+    parser.add_argument("--force", action="store_true", help="rebuild even if outputs are up to date")
+    parser.add_argument("--no-upload", action="store_true", help="build the files but skip S3")
+    parser.add_argument("--state", default=STATE_FILE, help="where build/upload records are kept")
+    args = parser.parse_args(argv)
+
+    timings = {}
+    t0 = time.perf_counter()
+    state = {} if args.force else load_state(args.state)
+    todo = [job for job in JOBS if not up_to_date(job, state)]
+    skipped = [job.name for job in JOBS if job not in todo]
+    timings["plan"] = time.perf_counter() - t0
+
+    # Curves shared by several jobs are solved once, here, and handed to the workers
+    t0 = time.perf_counter()
+    n_workers = min(args.jobs, len(todo)) if todo else 1
+    frames = solve_frames(todo) if n_workers > 1 else None
+    timings["solve"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    done, failed = schedule(todo, n_workers, frames)
+    timings["compute"] = time.perf_counter() - t0
+    for job in todo:
+        if job.name in done:
+            state[job.name] = {"stamp": stamp(job), "uploaded": False}
+
+    # One concurrent batch for everything built now or still waiting from an earlier run
+    upload_errors = {}
+    t0 = time.perf_counter()
+    to_upload = [job for job in JOBS
+                 if job.name in done or (job.name in skipped and not state[job.name].get("uploaded"))]
+    if to_upload and not args.no_upload:
+        from storage.uploader import upload_many
+        results = upload_many([pair for job in to_upload for pair in outputs(job)])
+        for job in to_upload:
+            errors = [results[pair] for pair in outputs(job) if "error" in results[pair]]
+            state[job.name]["uploaded"] = not errors
+            if errors:
+                upload_errors[job.name] = errors
+    timings["upload"] = time.perf_counter() - t0
+    save_state(args.state, state)
+
+    print("\nstage      seconds")
+    for stage, seconds in timings.items():
+        print(f"{stage:<10} {seconds:7.2f}")
+    print(f"{'total':<10} {sum(timings.values()):7.2f}")
+    print(f"\n{'job':<12} {'status':<26} seconds")
+    for job in JOBS:
+        if job.name in done:
+            status, seconds = "built", f"{done[job.name]:7.2f}"
+        elif job.name in failed:
+            status, seconds = "FAILED", failed[job.name]
+        else:
+            status, seconds = "up to date", ""
+        if job.name in upload_errors:
+            status += " (upload failed)"
+        elif args.no_upload and job in to_upload:
+            status += " (not uploaded)"
+        print(f"{job.name:<12} {status:<26} {seconds}")
+
+    return 1 if failed or upload_errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
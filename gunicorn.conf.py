@@ -0,0 +1,67 @@
+# gunicorn.conf.py
+"""
+Production serving: gunicorn -c gunicorn.conf.py main:app
+
+Every setting can be overridden from the environment, so the same image
+runs on a 1-vCPU Cloud Run instance or a bigger VM. The app is imported
+once in the master (preload_app) and the workers are forked from it, so
+NumPy and Flask are loaded once and shared copy-on-write. matplotlib and
+boto3 are imported lazily; with AMM_WARMUP=1 the master loads them too,
+otherwise each worker does on first use.
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8080)}"
+
+# The heavy work is NumPy/matplotlib and holds the GIL for much of the
+# time, so scale with processes (one per core by default) and use a few
+# threads per worker to overlap S3 and client I/O.
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+worker_class = "gthread"
+
+# Each worker has its own figure-rendering process pool (render.py); split
+# the cores between workers unless RENDER_PROCESSES is set explicitly
+os.environ.setdefault("RENDER_PROCESSES", str(max(1, multiprocessing.cpu_count() // workers)))
+
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+
+# A synchronous /store_stableswap renders and uploads six figures
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 300))
+# Cloud Run gives 10s between SIGTERM and SIGKILL
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 10))
+# Keep idle connections open a little longer than the load balancer probes them
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+
+# Recycle workers now and then to cap slow growth of the heap (0 = never)
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 0))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 0))
+
+# GUNICORN_ACCESS_LOG="" turns the access log off
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-") or None
+errorlog = "-"
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+
+
+def when_ready(server):
+    # AMM_WARMUP=1: warm the preloaded app in the master so every forked
+    # worker starts with matplotlib, boto3 and the curve solvers loaded
+    if preload_app and os.environ.get("AMM_WARMUP", "0") == "1":
+        import main
+        main.warm_up()
+
+
+def post_worker_init(worker):
+    # Without preloading each worker warms itself
+    if not preload_app and os.environ.get("AMM_WARMUP", "0") == "1":
+        import main
+        main.warm_up()
+
+
+def worker_exit(server, worker):
+    # Let background jobs this worker accepted finish before it goes away
+    import main
+    main.jobs.shutdown(wait=True)
+    import render
+    render.shutdown()
@@ -0,0 +1,151 @@
+# jobs.py
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from storage.sqlite import ProcessConnection
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+JOB_QUEUE_SIZE = int(os.environ.get("JOB_QUEUE_SIZE", 16))
+JOB_TTL_SECONDS = int(os.environ.get("JOB_TTL_SECONDS", 3600))
+JOB_DB = os.environ.get("JOB_DB", "/tmp/amm_jobs.sqlite")
+
+
+class JobQueueFull(Exception):
+    """Raised when every worker is busy and the pending queue is full."""
+
+
+class JobManager:
+    """
+    Bounded background worker pool for long-running requests.
+    At most max_workers jobs run at once and at most max_pending more wait;
+    beyond that submit() raises JobQueueFull. Finished jobs are kept for
+    ttl seconds so clients can poll their status.
+
+    Job records are mirrored to a SQLite file (path) so that under a
+    multi-worker server a status poll answered by another worker process
+    on the same instance still finds the job. The worker and queue limits
+    are per process.
+    """
+
+    def __init__(self, max_workers: int = JOB_WORKERS, max_pending: int = JOB_QUEUE_SIZE,
+                 ttl: int = JOB_TTL_SECONDS, path: str = JOB_DB):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._executor = None
+        self._db = ProcessConnection(path, (
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, job TEXT NOT NULL, finished REAL)"
+        ))
+
+    def _store(self, job: dict):
+        # Caller holds self._lock
+        try:
+            with self._db() as conn:
+                conn.execute("INSERT OR REPLACE INTO jobs (id, job, finished) VALUES (?, ?, ?)",
+                             (job["id"], json.dumps(job), job["finished"]))
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            print("❌ Job store write failed:", e)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Created on first use so no threads exist before a server forks workers
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="job")
+            return self._executor
+
+    def submit(self, fn, *args, **kwargs) -> str:
+        """
+        Queue fn(*args, progress=callback, **kwargs) and return its job id.
+        fn reports progress by calling callback(fraction, stage).
+        """
+        if not self._slots.acquire(blocking=False):
+            raise JobQueueFull(f"{self.max_workers + self.max_pending} jobs already queued or running")
+
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._prune(now)
+            self._jobs[job_id] = {
+                "id": job_id, "status": "queued", "stage": "queued", "progress": 0.0,
+                "created": now, "started": None, "finished": None,
+                "result": None, "error": None,
+            }
+            self._store(self._jobs[job_id])
+        try:
+            self._get_executor().submit(self._run, job_id, fn, args, kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        return job_id
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+            self._store(self._jobs[job_id])
+
+    def _run(self, job_id, fn, args, kwargs):
+        self._update(job_id, status="running", stage="started", started=time.time())
+
+        def progress(fraction: float, stage: str):
+            self._update(job_id, progress=round(float(fraction), 3), stage=stage)
+
+        try:
+            result = fn(*args, progress=progress, **kwargs)
+            self._update(job_id, status="done", stage="done", progress=1.0,
+                         result=result, finished=time.time())
+        except Exception as e:
+            traceback.print_exc()
+            self._update(job_id, status="failed", stage="failed",
+                         error={"error": type(e).__name__, "message": str(e)},
+                         finished=time.time())
+        finally:
+            self._slots.release()
+
+    def _prune(self, now: float):
+        expired = [jid for jid, job in self._jobs.items()
+                   if job["finished"] is not None and now - job["finished"] > self.ttl]
+        for jid in expired:
+            del self._jobs[jid]
+        try:
+            with self._db() as conn:
+                conn.execute("DELETE FROM jobs WHERE finished IS NOT NULL AND finished < ?",
+                             (now - self.ttl,))
+        except sqlite3.Error as e:
+            print("❌ Job store prune failed:", e)
+
+    def get(self, job_id: str):
+        """Snapshot of a job's record, or None if unknown/expired."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+            # Submitted by another worker process
+            try:
+                row = self._db().execute("SELECT job FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            except sqlite3.Error as e:
+                print("❌ Job store read failed:", e)
+                return None
+            if row is None:
+                return None
+            job = json.loads(row[0])
+            if job["finished"] is not None and time.time() - job["finished"] > self.ttl:
+                return None
+            return job
+
+    def shutdown(self, wait: bool = True):
+        """Stop taking jobs; with wait=True, let queued and running ones finish."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
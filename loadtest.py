@@ -0,0 +1,124 @@
+# loadtest.py
+"""
+Throughput of the gunicorn deployment as the worker count grows.
+
+For each worker count, starts `gunicorn -c gunicorn.conf.py main:app` on a
+local port, keeps `--clients` keep-alive connections busy with GET
+requests for `--duration` seconds and reports requests/second. The
+default request is a CPU-bound /curve computation (no S3, no rendering).
+
+    python loadtest.py                       # 1..cpu_count workers
+    python loadtest.py --workers 1 2 4 --path "/slippage?points=20000"
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+import time
+
+DEFAULT_PATH = "/curve?points=20000&cache=0&format=csv"
+
+
+def wait_until_up(port: int, timeout: float = 60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/curve?points=2")
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not come up")
+
+
+def hammer(port: int, path: str, clients: int, duration: float):
+    """(requests completed, errors, latencies in seconds) over duration"""
+    counts = []
+    lock = threading.Lock()
+    stop_at = time.time() + duration
+
+    def client():
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        done = errors = 0
+        latencies = []
+        while time.time() < stop_at:
+            t0 = time.perf_counter()
+            try:
+                conn.request("GET", path)
+                resp = conn.getresponse()
+                resp.read()
+                if resp.status == 200:
+                    done += 1
+                    latencies.append(time.perf_counter() - t0)
+                else:
+                    errors += 1
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        conn.close()
+        with lock:
+            counts.append((done, errors, latencies))
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    done = sum(c[0] for c in counts)
+    errors = sum(c[1] for c in counts)
+    latencies = sorted(l for c in counts for l in c[2])
+    return done, errors, latencies
+
+
+def run(workers: int, args) -> float:
+    env = dict(os.environ, PORT=str(args.port), WEB_CONCURRENCY=str(workers),
+               GUNICORN_THREADS=str(args.threads), GUNICORN_ACCESS_LOG="")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+        env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_up(args.port)
+        hammer(args.port, args.path, args.clients, min(2.0, args.duration))   # warm up
+        done, errors, latencies = hammer(args.port, args.path, args.clients, args.duration)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    rps = done / args.duration
+    p50 = latencies[len(latencies) // 2] * 1000 if latencies else float("nan")
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else float("nan")
+    print(f"{workers:>7} {rps:>9.1f} {p50:>9.1f} {p95:>9.1f} {errors:>7}")
+    return rps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cores = multiprocessing.cpu_count()
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, cores} & set(range(1, cores + 1))))
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=2 * cores + 2)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--path", default=DEFAULT_PATH)
+    args = parser.parse_args()
+
+    print(f"{cores} cores, {args.clients} clients, {args.threads} threads/worker, GET {args.path}")
+    print(f"{'workers':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7}")
+    base = None
+    for w in args.workers:
+        rps = run(w, args)
+        base = base or rps
+    if base and len(args.workers) > 1:
+        print(f"speedup at {args.workers[-1]} workers: {rps / base:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,19 @@
 import numpy as np
-import matplotlib.pyplot as plt
 from typing import Tuple
 import os
-from flask import Flask, jsonify, request
-from storage.uploader import upload_file   # your working uploader
+from flask import Flask, Response, jsonify, request
+from storage.uploader import upload_many   # your working uploader
+from storage.cache import ResultCache, cache_key
+from jobs import JobManager, JobQueueFull
+import tableformat
+from classcode.ysolver import SOLVERS, solve_y
+from classcode.dsolver import D_SOLVERS, compute_D, newton_D
+from classcode.pricing import marginal_price
+from classcode.sizing import dx_for_impact, dx_for_price
+from classcode.slippage import analytic_slippage
+from classcode.sampling import adaptive_grid
+from classcode.curvecache import curve_y
+from classcode.surrogate import CurveSurrogate
 
 
 class CurveStableSwap2Pool:
@@ -19,56 +29,46 @@ class CurveStableSwap2Pool:
     Where S = x + y (sum of balances)
     """
     
-    def __init__(self, balance_x: float, balance_y: float, A: int = 100, fee: float = 0.0004):
+    def __init__(self, balance_x: float, balance_y: float, A: int = 100, fee: float = 0.0004,
+                 solver: str = "newton", d_solver: str = "newton"):
         """
         Initialize StableSwap 2-pool
+
+        solver selects the y engine: "newton" (iterative) or
+        "quadratic" (closed form, Newton only as a fallback)
+        d_solver selects the D engine: "newton" or "cardano" (closed form)
         """
+        if solver not in SOLVERS:
+            raise ValueError(f"Unknown solver '{solver}', expected one of {SOLVERS}")
+        if d_solver not in D_SOLVERS:
+            raise ValueError(f"Unknown D solver '{d_solver}', expected one of {D_SOLVERS}")
         self.x = float(balance_x)
         self.y = float(balance_y)
         self.A = A
         self.fee = fee
+        self.solver = solver
+        self.d_solver = d_solver
         self.D = self._calculate_D()
+        self._spot_cache = None
+        self._surrogate = None
+        self._surrogate_rebuild = False
         
-    def _calculate_D(self, x: float = None, y: float = None) -> float:
+    def _calculate_D(self, x: float = None, y: float = None, D0: float = None) -> float:
         """
         Calculate invariant D using Newton-Raphson iteration
         This is the critical part that was wrong before
+
+        D0 warm-starts Newton (e.g. with the D from before a swap);
+        without it the iteration starts from S = x + y
         """
         if x is None:
             x = self.x
         if y is None:
             y = self.y
-            
-        S = x + y
-        if S == 0:
-            return 0
-            
-        D = S  # Initial guess
-        Ann = self.A * 4  # A * n^n where n=2, so n^n = 4
-        
-        # Newton-Raphson iteration to solve for D
-        for i in range(255):
-            D_P = D
-            # For 2 coins: D_P = D^3 / (4*x*y) 
-            # But we need to be more careful about the calculation
-            D_P = D * D * D / (4 * x * y)
-            
-            D_prev = D
-            # The Newton-Raphson update formula:
-            # f(D) = Ann*S + D - Ann*D - D^(n+1)/(n^n * prod(x_i))
-            # f'(D) = 1 - Ann - (n+1)*D^n/(n^n * prod(x_i))
-            # D_new = D - f(D)/f'(D)
-            
-            numerator = (Ann * S + D_P * 2) * D
-            denominator = (Ann - 1) * D + D_P * 3
-            
-            D = numerator / denominator
-            
-            # Check convergence
-            if abs(D - D_prev) <= 1:
-                break
-                
-        return D
+
+        if self.d_solver == "cardano":
+            return compute_D(x, y, self.A)
+        return newton_D(x, y, self.A, D0=D0)
     
     def _get_y(self, x_new: float) -> float:
         """
@@ -79,24 +79,7 @@ class CurveStableSwap2Pool:
         b = (4*A*x_new + D - 4*A*D) / 4*A
         c = -D^3 / (16*A*x_new)
         """
-        D = self.D
-        Ann = self.A * 4
-        
-        # Solve the quadratic equation ay^2 + by + c = 0
-        # After algebraic manipulation of the invariant
-        S = x_new
-        c = D * D * D / (4 * Ann * x_new)
-        b = S + D / Ann
-        
-        y_prev = D
-        # Newton-Raphson to solve for y
-        for i in range(255):
-            y = y_prev
-            y_prev = (y * y + c) / (2 * y + b - D)
-            if abs(y - y_prev) <= 1:
-                break
-                
-        return y_prev
+        return self._solve(x_new)
     
     def get_dy(self, dx: float) -> float:
         """
@@ -125,29 +108,84 @@ class CurveStableSwap2Pool:
         """
         Given new y balance, solve for x using the invariant
         """
-        D = self.D
-        Ann = self.A * 4
-        
-        S = y_new
-        c = D * D * D / (4 * Ann * y_new)
-        b = S + D / Ann
-        
-        x_prev = D
-        for i in range(255):
-            x = x_prev
-            x_prev = (x * x + c) / (2 * x + b - D)
-            if abs(x - x_prev) <= 1:
-                break
-                
-        return x_prev
+        # The n=2 invariant is symmetric in x and y
+        return self._solve(y_new)
     
+    def compile_surrogate(self, x_min: float = None, x_max: float = None,
+                          degree: int = 8, tol: float = 1e-6, rebuild: bool = False):
+        """
+        Compile the current curve into a piecewise Chebyshev surrogate and
+        use it for _get_y/_get_x, the batch quotes and apply_swaps inside
+        [x_min, x_max] (default D/100 .. 2D, scaled with D); points outside
+        fall back to the solver. A swap changes D, which the surrogate
+        follows by rescaling, so it is never rebuilt for one. A change of A
+        bypasses it until compile_surrogate is called again or, with
+        rebuild=True, rebuilds it on the next quote.
+        """
+        x_min = self.D / 100 if x_min is None else x_min
+        x_max = self.D * 2 if x_max is None else x_max
+        self._surrogate = CurveSurrogate(self.A, self.D, x_min, x_max, degree, tol)
+        self._surrogate_rebuild = rebuild
+        return self._surrogate
+
+    def _active_surrogate(self):
+        s = self._surrogate
+        if s is None or s.matches(self.A):
+            return s
+        if not self._surrogate_rebuild:
+            return None
+        self._surrogate = s.rebuild(self.A, self.D)
+        return self._surrogate
+
+    def _solve(self, v, D: float = None):
+        """y for balance(s) v on the D curve (default self.D), via the surrogate where it applies"""
+        D = self.D if D is None else D
+        s = self._active_surrogate()
+        if s is None:
+            return solve_y(v, D, self.A, self.solver)
+        k = s.scale(D)
+        if np.ndim(v) == 0:
+            u = v * k
+            if s.covers(u):
+                return s.eval_scalar(u) / k
+            return solve_y(v, D, self.A, self.solver)
+        u = v * k
+        y = s(u) / k
+        missing = ~s.covers(u)
+        if missing.any():
+            y[missing] = solve_y(v[missing], D, self.A, self.solver)
+        return y
+
+    def get_y_batch(self, x_array) -> np.ndarray:
+        """
+        Vectorized _get_y: solve y for every x in x_array at once.
+        Infeasible points (x <= 0) come back as NaN.
+        """
+        return self._solve(np.asarray(x_array, dtype=float))
+
+    def get_x_batch(self, y_array) -> np.ndarray:
+        """Vectorized _get_x (the n=2 invariant is symmetric in x and y)"""
+        return self._solve(np.asarray(y_array, dtype=float))
+
+    def get_dy_batch(self, dx_array) -> np.ndarray:
+        """Vectorized get_dy over an array of input amounts"""
+        y_new = self.get_y_batch(self.x + np.asarray(dx_array, dtype=float))
+        dy_after_fee = (self.y - y_new) * (1 - self.fee)
+        return np.maximum(0, dy_after_fee)
+
+    def get_dx_batch(self, dy_array) -> np.ndarray:
+        """Vectorized get_dx over an array of desired output amounts"""
+        y_new = self.y - np.asarray(dy_array, dtype=float) / (1 - self.fee)
+        x_new = self.get_x_batch(y_new)
+        return np.maximum(0, x_new - self.x)
+
     def swap_x_for_y(self, dx: float) -> float:
         """Execute swap: input dx, receive dy"""
         dy = self.get_dy(dx)
         
         self.x += dx
         self.y -= dy
-        self.D = self._calculate_D()
+        self.D = self._calculate_D(D0=self.D)
         
         return dy
     
@@ -157,14 +195,38 @@ class CurveStableSwap2Pool:
         
         self.y += dy
         self.x -= dx
-        self.D = self._calculate_D()
+        self.D = self._calculate_D(D0=self.D)
         
         return dx
+
+    def apply_swaps(self, dx_sequence) -> dict:
+        """
+        Execute a sequence of x -> y swaps (same maths as swap_x_for_y,
+        including the surrogate if one is compiled), warm-starting each D
+        update from the previous one.
+        Returns the trajectory after every swap as arrays x, y, D, dy.
+        """
+        dx_values = np.asarray(dx_sequence, dtype=float)
+        n = dx_values.size
+        xs, ys, Ds, dys = np.empty(n), np.empty(n), np.empty(n), np.empty(n)
+
+        x, y, D = self.x, self.y, self.D
+        fee_factor = 1 - self.fee
+        calculate_D, solve = self._calculate_D, self._solve
+        for i, dx in enumerate(dx_values.tolist()):
+            x_new = x + dx
+            dy = max(0, (y - solve(x_new, D)) * fee_factor)
+            x = x_new
+            y -= dy
+            D = calculate_D(x, y, D0=D)
+            xs[i], ys[i], Ds[i], dys[i] = x, y, D, dy
+
+        self.x, self.y, self.D = x, y, D
+        return {"x": xs, "y": ys, "D": Ds, "dy": dys}
     
     def get_spot_price(self) -> float:
-        """Get instantaneous price dy/dx"""
-        small_amount = 1.0
-        return self.get_dy(small_amount) / small_amount
+        """Get instantaneous price dy/dx (analytic marginal price, after fee)"""
+        return self.spot_price() * (1 - self.fee)
     
     def get_price_impact(self, dx: float) -> float:
         """Calculate price impact percentage"""
@@ -176,184 +238,264 @@ class CurveStableSwap2Pool:
             return abs(1 - average_price / spot_price) * 100
         return 0
 
-def plot_invariant_curve(out_file="/tmp/stableswap2.png", A1=10, A2=100, A3=1000, scaling=1000, liquidity=2_000_000):
+    def spot_price(self) -> float:
+        """
+        Analytic marginal price -dy/dx at the current state (before fee).
+        Cached against (x, y, D, A), so it is recomputed only after the
+        state changes (a swap, or D/balances being set directly).
+        """
+        key = (self.x, self.y, self.D, self.A)
+        if self._spot_cache is None or self._spot_cache[0] != key:
+            self._spot_cache = (key, marginal_price(self.x, self.y, self.D, self.A))
+        return self._spot_cache[1]
+
+    def marginal_price_at(self, x_new):
+        """Analytic marginal price at balance x_new on the current curve (one y solve)"""
+        y_new = self._get_y(x_new)
+        return marginal_price(x_new, y_new, self.D, self.A)
+
+    def price_impact(self, dx):
+        """
+        Price impact percentage of dx against the analytic spot price.
+        Costs one y solve (spot_price is cached); dx may be an array.
+        The fee scales both prices equally, so it is left out.
+        """
+        dx = np.asarray(dx, dtype=float)
+        average_price = (self.y - self._get_y(self.x + dx)) / dx
+        impact = np.abs(1 - average_price / self.spot_price()) * 100
+        return float(impact) if impact.ndim == 0 else impact
+
+    def max_dx_for_impact(self, bps: float) -> float:
+        """Largest dx whose price_impact stays within bps basis points"""
+        return float(self.max_dx_for_impact_batch(bps))
+
+    def max_dx_for_impact_batch(self, bps_array) -> np.ndarray:
+        """Vectorized max_dx_for_impact over an array of bps limits"""
+        return dx_for_impact(self.x, self.y, self.D, self.A, bps_array)
+
+    def dx_to_reach_price(self, p: float) -> float:
+        """Input dx that moves the marginal price (before fee) down to p"""
+        return float(self.dx_to_reach_price_batch(p))
 
+    def dx_to_reach_price_batch(self, p_array) -> np.ndarray:
+        """Vectorized dx_to_reach_price over an array of target prices"""
+        return dx_for_price(self.x, self.D, self.A, p_array)
+
+def _curve_functions(A_values, liquidity, solver="newton", d_solver="newton", use_cache=False):
     """
-    Visualize the actual StableSwap curve vs other AMM curves
+    x -> y for each StableSwap curve (A_values order), then the CPMM
+    curve; plus the invariant D of each StableSwap curve. use_cache
+    interpolates from the normalized-curve cache instead of solving,
+    so solver then plays no part; it is opt-in, since the direct solve
+    is no slower on these grids and exact.
     """
-    # Initialize pools with same liquidity
-    total_liquidity = liquidity
-    curve_a100 = CurveStableSwap2Pool(liquidity // 2, liquidity // 2, A=A1)
-    curve_a10 = CurveStableSwap2Pool(liquidity // 2, liquidity // 2, A=A2)
-    curve_a1000 = CurveStableSwap2Pool(liquidity // 2, liquidity // 2, A=A3)
+    functions, D_values = [], []
+    for A in A_values:
+        pool = CurveStableSwap2Pool(liquidity // 2, liquidity // 2, A=A, solver=solver, d_solver=d_solver)
+        if use_cache:
+            functions.append(lambda x, A=A, D=pool.D: curve_y(x, A, D))
+        else:
+            functions.append(pool.get_y_batch)
+        D_values.append(pool.D)
+    k = (liquidity // 2) * (liquidity // 2)
+    functions.append(lambda x: k / x)
+    return functions, D_values
+
 
-    # Generate x values
+def compute_curve_data(A_values=(10, 100, 1000), liquidity=2_000_000, n_points=1000,
+                       solver="newton", d_solver="newton", use_cache=False):
+    """
+    The numbers behind plot_invariant_curve, without any rendering:
+    the x grid, y on each StableSwap curve (in A_values order) and the
+    constant-product reference, all for a balanced pool of size liquidity.
+    """
     factor = int(liquidity / 20)
-    x_values = np.linspace(factor, liquidity - factor, 1000)
+    x_values = np.linspace(factor, liquidity - factor, n_points)
 
-    curve_y_a100 = []
-    curve_y_a10 = []
-    curve_y_a1000 = []
-    constant_product_y = []
-    
-    # Calculate corresponding y values for each x
+    (*curves, constant_product), D_values = _curve_functions(A_values, liquidity, solver, d_solver,
+                                                             use_cache)
+    return {"x": x_values, "A": list(A_values), "D": D_values, "y": [f(x_values) for f in curves],
+            "cpmm": constant_product(x_values)}
+
+
+# Adaptive sampling tolerance, as a fraction of liquidity (1e-4 of the
+# default 2M pool is ~0.1 px on the invariant figure)
+CURVE_TOL = 1e-4
+
+
+def adaptive_curve_samples(A_values=(10, 100, 1000), liquidity=2_000_000, max_points=1000,
+                           tol=CURVE_TOL, solver="newton", d_solver="newton", use_cache=False):
+    """
+    Each curve of compute_curve_data (CPMM last) sampled on its own
+    adaptive grid (classcode.sampling.Sample), refined until linear
+    interpolation is within tol * liquidity or max_points is reached.
+    Flat, high-A curves need only a few dozen points.
+    """
+    factor = int(liquidity / 20)
+    functions, _ = _curve_functions(A_values, liquidity, solver, d_solver, use_cache)
+    return [adaptive_grid(f, factor, liquidity - factor, tol * liquidity, max_points)
+            for f in functions]
+
+
+def adaptive_curve_data(A_values=(10, 100, 1000), liquidity=2_000_000, max_points=1000,
+                        tol=CURVE_TOL, solver="newton", d_solver="newton", use_cache=False):
+    """
+    compute_curve_data on one adaptive grid shared by all curves: points
+    go where any of the curves bends, up to max_points in total.
+    """
+    functions, D_values = _curve_functions(A_values, liquidity, solver, d_solver, use_cache)
+    factor = int(liquidity / 20)
+    sample = adaptive_grid(lambda x: np.vstack([f(x) for f in functions]),
+                           factor, liquidity - factor, tol * liquidity, max_points)
+    return {"x": sample.x, "A": list(A_values), "D": D_values, "y": list(sample.y[:-1]),
+            "cpmm": sample.y[-1]}
+
+
+STREAM_CHUNK = int(os.environ.get("STREAM_CHUNK", 65_536))
+
+
+def iter_curve_data(A_values=(10, 100, 1000), liquidity=2_000_000, n_points=1000,
+                    solver="newton", d_solver="newton", use_cache=False,
+                    chunk_size=STREAM_CHUNK, overlap=0):
+    """
+    compute_curve_data in blocks of chunk_size grid points, so an n_points
+    grid never has to be held in memory at once. Each block carries overlap
+    extra points past its end (e.g. 1 for slippage, which needs the next y).
+    The x values are bit-identical to np.linspace over the full grid.
+    """
+    factor = int(liquidity / 20)
+    lo, hi = float(factor), float(liquidity - factor)
+    step = (hi - lo) / (n_points - 1)
+    pools = [CurveStableSwap2Pool(liquidity // 2, liquidity // 2, A=A, solver=solver, d_solver=d_solver)
+             for A in A_values]
     k = (liquidity // 2) * (liquidity // 2)
 
+    for start in range(0, n_points, chunk_size):
+        stop = min(start + chunk_size + overlap, n_points)
+        x_values = lo + np.arange(start, stop) * step
+        if stop == n_points:
+            x_values[-1] = hi
+        curves = [curve_y(x_values, pool.A, pool.D) if use_cache else pool.get_y_batch(x_values)
+                  for pool in pools]
+        yield {"x": x_values, "A": list(A_values), "D": [pool.D for pool in pools], "y": curves,
+               "cpmm": k / x_values}
 
-    for x in x_values:
-        try:
-            # Curve with different A values
-            y_100 = curve_a100._get_y(x)
-            y_10 = curve_a10._get_y(x)
-            y_1000 = curve_a1000._get_y(x)
-            
-            curve_y_a100.append(y_100)
-            curve_y_a10.append(y_10)
-            curve_y_a1000.append(y_1000)
-            
-            # Constant product (Uniswap)
-            y_cp = k / x
-            constant_product_y.append(y_cp)
-            
-        except:
-            curve_y_a100.append(np.nan)
-            curve_y_a10.append(np.nan)
-            curve_y_a1000.append(np.nan)
-            constant_product_y.append(np.nan)
-    
-    # Plot the curves
-    plt.figure(figsize=(12, 8))
-  
-    plt.plot(x_values/scaling, np.array(curve_y_a10)/scaling, 'b--', label=f'Curve A={A1}', linewidth=2)
-    plt.plot(x_values/scaling, np.array(curve_y_a100)/scaling, 'b-', label=f'Curve A={A2}', linewidth=2)
-    plt.plot(x_values/scaling, np.array(curve_y_a1000)/scaling, 'g-', label=f'Curve A={A3}', linewidth=2)
-    plt.plot(x_values/scaling, np.array(constant_product_y)/scaling, 'r--', label='Constant Product (Uniswap)', linewidth=2)
-    
-    plt.plot(1_000_000/scaling, 1_000_000/scaling, 'ro', markersize=8, label='Balanced Point')
 
-    
-    # Add balance point
-    plt.xlabel(f'Token X Balance (÷{scaling})')
-    plt.ylabel(f'Token Y Balance (÷{scaling})')
-
-    plt.title('AMM Invariant Curves Comparison')
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-   
-    #plt.xlim(100, 3000)
-    #plt.ylim(100, 3000)
-    
-    plt.xlim(100, total_liquidity/scaling - 100)
-    plt.ylim(100, total_liquidity/scaling - 100)
-    diag_x = np.linspace(100, total_liquidity/scaling - 100, 100)
+def curve_slippage(data, scaling=1000) -> np.ndarray:
+    """
+    Slippage between neighbouring grid points for every curve of
+    compute_curve_data output (one row per A, CPMM last): actual Δy minus
+    Δx times the analytic marginal price at the left point, divided by
+    scaling. For CPMM (A = 0) that price is y/x.
+    """
+    Y = np.vstack(data["y"] + [data["cpmm"]])
+    return analytic_slippage(data["x"], Y, data["D"] + [1.0], data["A"] + [0], scaling)
 
-    # Add diagonal line for reference
-    plt.plot(diag_x, diag_x, 'k:', alpha=0.5, label='x = y line')
-    
-    plt.tight_layout()
-    plt.savefig(out_file)
 
-    # --- New: slippage calc for A2 ---
-    delta_x = x_values[1] - x_values[0]
+def invariant_curve_figures(data, scaling=1000, liquidity=2_000_000, samples=None) -> dict:
+    """
+    Figure specs (see render.py) for the output of compute_curve_data with
+    three A values: the invariant comparison, slippage for each A and
+    CPMM, and all slippage curves overlaid. Keys are the file suffixes.
+    If samples (adaptive_curve_samples output) is given, the invariant
+    comparison draws each curve from its own adaptive grid; slippage is
+    defined per fixed step Δx, so it always uses the uniform grid of data.
+    """
+    from render import line
 
-    slippages = []
-    for i in range(len(x_values) - 1):
-        dx = x_values[i+1] - x_values[i]
-        dy_actual = curve_y_a100[i+1] - curve_y_a100[i]
-        spot_price = curve_y_a100[i] / x_values[i]   # ≈1 at balance
-        expected_delta_y = dx * spot_price
-        slippages.append((dy_actual - expected_delta_y) / scaling)  # scale here
-
-    plt.figure(figsize=(12, 6))
-    plt.plot(x_values[:-1]/scaling, slippages, 'm-', label=f'Slippage A={A2}')
-    plt.xlabel(f'Token X Balance (÷{scaling})')
-    plt.ylabel('Slippage (Δy - Δx)')
-    plt.title(f'Slippage Curve for A={A2}, Δx={int(delta_x)}')
-
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(out_file.replace(".png", "") + "-A2.png")
-    slippages_A2 = slippages   # ✅ store for later
-
-    # --- Slippage calc for A1 ---
+    x_values = data["x"]
+    A1, A2, A3 = data["A"]
+    curve_y_a1, curve_y_a2, curve_y_a3 = data["y"]
+    constant_product_y = data["cpmm"]
+    total_liquidity = liquidity
     delta_x = x_values[1] - x_values[0]
-    slippages = []
-    for i in range(len(x_values) - 1):
-        dx = x_values[i+1] - x_values[i]
-        dy_actual = curve_y_a10[i+1] - curve_y_a10[i]
-        spot_price = curve_y_a10[i] / x_values[i]
-        expected_delta_y = dx * spot_price
-        slippages.append((dy_actual - expected_delta_y) / scaling)
-
-    plt.figure(figsize=(12, 6))
-    plt.plot(x_values[:-1]/scaling, slippages, 'c-', label=f'Slippage A={A1}')
-    plt.xlabel(f'Token X Balance (÷{scaling})')
-    plt.ylabel('Slippage (Δy - Δx)')
-    plt.title(f'Slippage Curve for A={A1}, Δx={int(delta_x)}')
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(out_file.replace(".png", "") + "-A1.png")
-    slippages_A1 = slippages   # ✅ store for later
-
-    # --- Slippage calc for A2 (already working) ---
-    # [your existing A2 block here]
-
-    # --- Slippage calc for A3 ---
-    slippages = []
-    for i in range(len(x_values) - 1):
-        dx = x_values[i+1] - x_values[i]
-        dy_actual = curve_y_a1000[i+1] - curve_y_a1000[i]
-        spot_price = curve_y_a1000[i] / x_values[i]
-        expected_delta_y = dx * spot_price
-        slippages.append((dy_actual - expected_delta_y) / scaling)
-
-    plt.figure(figsize=(12, 6))
-    plt.plot(x_values[:-1]/scaling, slippages, 'g-', label=f'Slippage A={A3}')
-    plt.xlabel(f'Token X Balance (÷{scaling})')
-    plt.ylabel('Slippage (Δy - Δx)')
-    plt.title(f'Slippage Curve for A={A3}, Δx={int(delta_x)}')
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(out_file.replace(".png", "") + "-A3.png")
-    slippages_A3 = slippages   # ✅ store for later
-
-    # --- Slippage calc for CPMM ---
-    slippages = []
-    for i in range(len(x_values) - 1):
-        dx = x_values[i+1] - x_values[i]
-        dy_actual = constant_product_y[i+1] - constant_product_y[i]
-        spot_price = constant_product_y[i] / x_values[i]
-        expected_delta_y = dx * spot_price
-        slippages.append((dy_actual - expected_delta_y) / scaling)
-
-    plt.figure(figsize=(12, 6))
-    plt.plot(x_values[:-1]/scaling, slippages, 'r-', label='Slippage CPMM')
-    plt.xlabel(f'Token X Balance (÷{scaling})')
-    plt.ylabel('Slippage (Δy - Δx)')
-    plt.title(f'Slippage Curve for CPMM, Δx={int(delta_x)}')
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(out_file.replace(".png", "") + "-CPMM.png")
-    slippages_CPMM = slippages   # ✅ store for later
-
-    # --- Superimposed slippage plot (ALL) ---
-    plt.figure(figsize=(12, 6))
-    plt.plot(x_values[:-1]/scaling, slippages_A1, 'b--', label=f'Slippage A={A1}')
-    plt.plot(x_values[:-1]/scaling, slippages_A2, 'm-',  label=f'Slippage A={A2}')
-    plt.plot(x_values[:-1]/scaling, slippages_A3, 'g-',  label=f'Slippage A={A3}')
-    plt.plot(x_values[:-1]/scaling, slippages_CPMM, 'r--', label='Slippage CPMM')
-
-    plt.xlabel(f'Token X Balance (÷{scaling})')
-    plt.ylabel(f'Slippage (Δy - Δx) ÷{scaling}')
-    plt.title(f'Slippage Comparison, Δx={int(delta_x)}')
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(out_file.replace(".png", "") + "-ALL.png")
+    xs = x_values / scaling
+    if samples is None:
+        curve_xy = [(x_values, y) for y in (curve_y_a1, curve_y_a2, curve_y_a3, constant_product_y)]
+    else:
+        curve_xy = [(s.x, s.y) for s in samples]
+    (x1, y1), (x2, y2), (x3, y3), (xc, yc) = ((x / scaling, y / scaling) for x, y in curve_xy)
+
+    figures = {}
+    diag_x = np.linspace(100, total_liquidity/scaling - 100, 100)
+    figures[""] = {
+        "figsize": (12, 8),
+        "lines": [
+            line(x1, y1, 'b--', label=f'Curve A={A1}', linewidth=2),
+            line(x2, y2, 'b-', label=f'Curve A={A2}', linewidth=2),
+            line(x3, y3, 'g-', label=f'Curve A={A3}', linewidth=2),
+            line(xc, yc, 'r--', label='Constant Product (Uniswap)', linewidth=2),
+            line(1_000_000/scaling, 1_000_000/scaling, 'ro', markersize=8, label='Balanced Point'),
+            # Diagonal for reference (drawn after the legend was built, so unlabelled)
+            line(diag_x, diag_x, 'k:', alpha=0.5),
+        ],
+        "xlabel": f'Token X Balance (÷{scaling})',
+        "ylabel": f'Token Y Balance (÷{scaling})',
+        "title": 'AMM Invariant Curves Comparison',
+        "xlim": (100, total_liquidity/scaling - 100),
+        "ylim": (100, total_liquidity/scaling - 100),
+    }
+
+    slippages = dict(zip(("A1", "A2", "A3", "CPMM"), curve_slippage(data, scaling)))
+    names = {"A1": f"A={A1}", "A2": f"A={A2}", "A3": f"A={A3}", "CPMM": "CPMM"}
+    colours = {"A1": 'c-', "A2": 'm-', "A3": 'g-', "CPMM": 'r-'}
+    for key in ("A2", "A1", "A3", "CPMM"):
+        figures[f"-{key}"] = {
+            "figsize": (12, 6),
+            "lines": [line(xs[:-1], slippages[key], colours[key], label=f'Slippage {names[key]}')],
+            "xlabel": f'Token X Balance (÷{scaling})',
+            "ylabel": 'Slippage (Δy - Δx)',
+            "title": f'Slippage Curve for {names[key]}, Δx={int(delta_x)}',
+        }
+
+    figures["-ALL"] = {
+        "figsize": (12, 6),
+        "lines": [
+            line(xs[:-1], slippages["A1"], 'b--', label=f'Slippage A={A1}'),
+            line(xs[:-1], slippages["A2"], 'm-', label=f'Slippage A={A2}'),
+            line(xs[:-1], slippages["A3"], 'g-', label=f'Slippage A={A3}'),
+            line(xs[:-1], slippages["CPMM"], 'r--', label='Slippage CPMM'),
+        ],
+        "xlabel": f'Token X Balance (÷{scaling})',
+        "ylabel": f'Slippage (Δy - Δx) ÷{scaling}',
+        "title": f'Slippage Comparison, Δx={int(delta_x)}',
+    }
+    return figures
+
+
+def plot_invariant_curve(out_file="/tmp/stableswap2.png", A1=10, A2=100, A3=1000, scaling=1000, liquidity=2_000_000,
+                         solver="newton", d_solver="newton", use_cache=False, to_memory=False, adaptive=False):
+
+    """
+    Visualize the actual StableSwap curve vs other AMM curves
+
+    With use_cache the curves are rescaled from the process-wide
+    normalized-curve cache instead of being solved for this liquidity
+    (solver is then unused).
+    With to_memory nothing is written to disk: the PNGs are returned as
+    {suffix: bytes}, suffix being "" for the main figure or e.g. "-A1".
+    Figures are drawn by render.py, one private Figure per image, so this
+    is safe to call from several threads at once; with RENDER_PROCESSES > 1
+    the six figures are rendered in parallel processes. With adaptive the
+    invariant comparison samples each curve adaptively (CURVE_TOL) instead
+    of on the fixed 1000-point grid. It is off by default: the slippage
+    figures need the uniform grid anyway, so the adaptive samples would
+    be extra solves on top of it (GET /curve?grid=adaptive is where the
+    adaptive grid saves work).
+    """
+    from render import render_figures
+
+    data = compute_curve_data((A1, A2, A3), liquidity, 1000, solver, d_solver, use_cache)
+    samples = (adaptive_curve_samples((A1, A2, A3), liquidity, 1000, CURVE_TOL, solver, d_solver, use_cache)
+               if adaptive else None)
+    images = render_figures(invariant_curve_figures(data, scaling, liquidity, samples))
+    if to_memory:
+        return images
+
+    for suffix, png in images.items():
+        with open(out_file.replace(".png", "") + suffix + ".png" if suffix else out_file, "wb") as f:
+            f.write(png)
+    return None
 
 
 
@@ -412,12 +554,93 @@ def test_extreme_imbalance():
         print(f"  New balances: X = ${pool.x:,.0f}, Y = ${pool.y:,.0f}")
         print(f"  Ratio X/Y = {pool.x/pool.y:.3f}")
 
+def run_store_stableswap(filename, A1=10, A2=100, A3=1000, scaling=1000, liquidity=2_000_000,
+                         solver="newton", d_solver="newton", use_cache=False, to_disk=False,
+                         progress=None):
+    """
+    Render the StableSwap figures and upload them to S3.
+    Figures are rendered to memory and uploaded from there; to_disk keeps
+    the old /tmp round trip (useful for inspecting the files locally).
+    progress(fraction, stage) is called as the pipeline advances (used
+    by async jobs); returns the per-artifact upload results.
+    """
+    def report(fraction, stage):
+        if progress is not None:
+            progress(fraction, stage)
+
+    local_file = f"/tmp/{filename}"
+
+    report(0.05, "rendering")
+    print(f"🟢 Generating StableSwap curve: {local_file} with A1={A1}, A2={A2}, A3={A3}, scaling={scaling}")
+    images = plot_invariant_curve(local_file, A1, A2, A3, scaling, liquidity, solver, d_solver,
+                                  use_cache, to_memory=not to_disk)
+
+    # One upload per unique artifact, run concurrently
+    base_local = local_file.replace(".png", "")
+    base_name = filename.replace(".png", "")
+    artifacts = {"main": ""}
+    for suffix in ("A1", "A2", "A3", "CPMM", "ALL"):
+        artifacts[f"slippage_{suffix}"] = f"-{suffix}"
+
+    plan = {}
+    for artifact, suffix in artifacts.items():
+        local = f"{base_local}{suffix}.png" if suffix else local_file
+        remote = f"{base_name}{suffix}.png" if suffix else filename
+        plan[artifact] = (local if to_disk else images[suffix], remote)
+        print(f"🟢 Uploading {local if to_disk else artifact} to S3 as {remote}")
+
+    report(0.5, "uploading")
+    uploaded = upload_many(plan.values(),
+                           on_done=lambda done, total: report(0.5 + 0.5 * done / total, "uploading"))
+
+    return {artifact: uploaded[pair] for artifact, pair in plan.items()}
+
+
+# Bump when the figures or their maths change, so cached artifacts are not reused
+ENGINE_VERSION = "4"
+
+
+def run_store_stableswap_cached(key, *args, progress=None):
+    """run_store_stableswap, recording the result in the cache if every upload succeeded"""
+    result = run_store_stableswap(*args, progress=progress)
+    if not any("error" in artifact for artifact in result.values()):
+        results.put(key, args[0], result)
+    return result
+
+
+def warm_up(A_values=(10, 100, 1000)):
+    """
+    Pay the one-off costs ahead of the first request: import the
+    matplotlib modules render.py draws with (and load the font cache),
+    import boto3, and solve the default curves once
+    (loading the numba kernels when JIT is enabled). Run with AMM_WARMUP=1
+    (see gunicorn.conf.py); the S3 client itself is still created per
+    process on first upload.
+    """
+    import matplotlib.backends.backend_agg  # noqa: F401
+    import matplotlib.figure  # noqa: F401
+    import boto3  # noqa: F401
+    compute_curve_data(A_values, n_points=2)
+
+
+def _range_error(A_values, liquidity, scaling):
+    """Message for out-of-range curve parameters, or None if they are usable"""
+    if any(A <= 0 for A in A_values):
+        return "A values must be positive"
+    if liquidity <= 0:
+        return "liquidity must be positive"
+    if scaling <= 0:
+        return "scaling must be positive"
+    return None
+
+
 app = Flask(__name__)
+jobs = JobManager()
+results = ResultCache()
 
 @app.route("/store_stableswap", methods=["POST"])
 def store_stableswap():
     filename = request.args.get("filename", "stableswap23.png")
-    local_file = f"/tmp/{filename}"
 
     # NEW: read A values from query params
     A1 = int(request.args.get("A1", 10))
@@ -425,65 +648,190 @@ def store_stableswap():
     A3 = int(request.args.get("A3", 1000))
     scaling = int(request.args.get("scaling", 1000))
     liquidity = int(request.args.get("liquidity", 2_000_000))
-
-
-    print(f"🟢 Generating StableSwap curve: {local_file} with A1={A1}, A2={A2}, A3={A3}, scaling={scaling}")
-    plot_invariant_curve(local_file, A1, A2, A3, scaling, liquidity)
-
-    print(f"🟢 Uploading {local_file} to S3 as {filename}")
-    result = upload_file(local_file, filename)
-
-    slippage_file = local_file.replace(".png", "") + "-A2.png"
-    slippage_name = filename.replace(".png", "") + "-A2.png"
-    print(f"🟢 Uploading {slippage_file} to S3 as {slippage_name}")
-    result_slip = upload_file(slippage_file, slippage_name)
-
-    print(f"🟢 Uploading {local_file} to S3 as {filename}")
-    result = upload_file(local_file, filename)
-
-    # --- Upload slippage A1 ---
-    slippage_file_A1 = local_file.replace(".png", "") + "-A1.png"
-    slippage_name_A1 = filename.replace(".png", "") + "-A1.png"
-    print(f"🟢 Uploading {slippage_file_A1} to S3 as {slippage_name_A1}")
-    result_slip_A1 = upload_file(slippage_file_A1, slippage_name_A1)
-
-    # --- Upload slippage A2 ---
-    slippage_file_A2 = local_file.replace(".png", "") + "-A2.png"
-    slippage_name_A2 = filename.replace(".png", "") + "-A2.png"
-    print(f"🟢 Uploading {slippage_file_A2} to S3 as {slippage_name_A2}")
-    result_slip_A2 = upload_file(slippage_file_A2, slippage_name_A2)
-
-    # --- Upload slippage A3 ---
-    slippage_file_A3 = local_file.replace(".png", "") + "-A3.png"
-    slippage_name_A3 = filename.replace(".png", "") + "-A3.png"
-    print(f"🟢 Uploading {slippage_file_A3} to S3 as {slippage_name_A3}")
-    result_slip_A3 = upload_file(slippage_file_A3, slippage_name_A3)
-
-    # --- Upload slippage CPMM ---
-    slippage_file_CPMM = local_file.replace(".png", "") + "-CPMM.png"
-    slippage_name_CPMM = filename.replace(".png", "") + "-CPMM.png"
-    print(f"🟢 Uploading {slippage_file_CPMM} to S3 as {slippage_name_CPMM}")
-    result_slip_CPMM = upload_file(slippage_file_CPMM, slippage_name_CPMM)
-
-    # --- Upload slippage ALL ---
-    slippage_file_ALL = local_file.replace(".png", "") + "-ALL.png"
-    slippage_name_ALL = filename.replace(".png", "") + "-ALL.png"
-    print(f"🟢 Uploading {slippage_file_ALL} to S3 as {slippage_name_ALL}")
-    result_slip_ALL = upload_file(slippage_file_ALL, slippage_name_ALL)
-
-    return jsonify({
-        "main": result,
-        "slippage_A1": result_slip_A1,
-        "slippage_A2": result_slip_A2,
-        "slippage_A3": result_slip_A3,
-        "slippage_CPMM": result_slip_CPMM,
-        "slippage_ALL": result_slip_ALL
-    })
-
+    error = _range_error((A1, A2, A3), liquidity, scaling)
+    if error is not None:
+        return jsonify({"error": error}), 400
+    solver = request.args.get("solver", "newton")
+    if solver not in SOLVERS:
+        return jsonify({"error": f"unknown solver '{solver}'", "solvers": list(SOLVERS)}), 400
+    d_solver = request.args.get("d_solver", "newton")
+    if d_solver not in D_SOLVERS:
+        return jsonify({"error": f"unknown d_solver '{d_solver}'", "d_solvers": list(D_SOLVERS)}), 400
+    use_cache = request.args.get("cache", "0") == "1"
+    to_disk = request.args.get("to_disk", os.environ.get("STORE_TO_DISK", "0")) == "1"
+
+    args = (filename, A1, A2, A3, scaling, liquidity, solver, d_solver, use_cache, to_disk)
+
+    # Identical requests reuse the artifacts of an earlier run; force=1 re-renders. The
+    # filename is part of the key: a hit hands back the objects stored under that name
+    key = cache_key({"filename": filename, "A1": A1, "A2": A2, "A3": A3, "scaling": scaling, "liquidity": liquidity,
+                     "solver": None if use_cache else solver, "d_solver": d_solver,
+                     "cache": use_cache}, ENGINE_VERSION)
+    if request.args.get("force", "0") != "1":
+        cached = results.get(key)
+        if cached is not None:
+            return jsonify(cached), 200, {"X-Cache": "HIT"}
+
+    # async=1: queue the job and return immediately; poll GET /jobs/<id>
+    if request.args.get("async", "0") == "1":
+        try:
+            job_id = jobs.submit(run_store_stableswap_cached, key, *args)
+        except JobQueueFull as e:
+            return jsonify({"error": "busy", "message": str(e)}), 503, {"Retry-After": "5"}
+        return jsonify({
+            "job_id": job_id,
+            "status": "queued",
+            "status_url": f"/jobs/{job_id}",
+        }), 202, {"Location": f"/jobs/{job_id}"}
+
+    return jsonify(run_store_stableswap_cached(key, *args)), 200, {"X-Cache": "MISS"}
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "not_found", "job_id": job_id}), 404
+    return jsonify(job)
+
+
+MAX_POINTS = int(os.environ.get("MAX_POINTS", 100_000))
+MAX_STREAM_POINTS = int(os.environ.get("MAX_STREAM_POINTS", 10_000_000))
+
+
+def _curve_request_params():
+    """Shared query parameters of GET /curve and GET /slippage"""
+    A_values = [int(request.args.get(name, default))
+                for name, default in (("A1", 10), ("A2", 100), ("A3", 1000))]
+    params = {
+        "A": list(dict.fromkeys(A_values)),
+        "liquidity": int(request.args.get("liquidity", 2_000_000)),
+        "scaling": int(request.args.get("scaling", 1000)),
+        "points": int(request.args.get("points", 1000)),
+        "solver": request.args.get("solver", "newton"),
+        "d_solver": request.args.get("d_solver", "newton"),
+        "cache": request.args.get("cache", "0") == "1",
+        "grid": request.args.get("grid", "uniform"),
+    }
+    if params["grid"] == "adaptive":
+        # points is then the budget, tol the error bound as a fraction of liquidity
+        params["tol"] = float(request.args.get("tol", CURVE_TOL))
+        if not params["tol"] > 0:
+            raise ValueError("tol must be positive")
+    elif params["grid"] != "uniform":
+        raise ValueError(f"unknown grid '{params['grid']}', expected 'uniform' or 'adaptive'")
+    if params["solver"] not in SOLVERS:
+        raise ValueError(f"unknown solver '{params['solver']}'")
+    if params["d_solver"] not in D_SOLVERS:
+        raise ValueError(f"unknown d_solver '{params['d_solver']}'")
+    if params["points"] < 2:
+        raise ValueError("points must be at least 2")
+    error = _range_error(params["A"], params["liquidity"], params["scaling"])
+    if error is not None:
+        raise ValueError(error)
+    return params
+
+
+def _streaming_requested():
+    return (request.args.get("stream", "0") == "1"
+            or request.args.get("format", "").lower() == "ndjson"
+            or request.accept_mimetypes.best == tableformat.NDJSON)
+
+
+def _curve_columns(params, slippage=False):
+    if params["grid"] == "adaptive":
+        data = adaptive_curve_data(params["A"], params["liquidity"], params["points"], params["tol"],
+                                   params["solver"], params["d_solver"], params["cache"])
+    else:
+        data = compute_curve_data(params["A"], params["liquidity"], params["points"],
+                                  params["solver"], params["d_solver"], params["cache"])
+    return _columns_from_data(data, params, slippage)
+
+
+def _iter_curve_columns(params, slippage=False):
+    """_curve_columns block by block, for streamed responses"""
+    blocks = iter_curve_data(params["A"], params["liquidity"], params["points"],
+                             params["solver"], params["d_solver"], params["cache"],
+                             overlap=1 if slippage else 0)
+    for data in blocks:
+        if slippage and data["x"].size < 2:
+            continue
+        yield _columns_from_data(data, params, slippage)
+
+
+def _columns_from_data(data, params, slippage):
+    x = data["x"]
+    if not slippage:
+        columns = {"x": x}
+        columns.update({f"y_A{A}": y for A, y in zip(data["A"], data["y"])})
+        columns["y_cpmm"] = data["cpmm"]
+        return columns
+
+    # One value per step, reported at the step's left edge (as plotted)
+    scaling = params["scaling"]
+    columns = {"x": x[:-1]}
+    names = [f"slippage_A{A}" for A in data["A"]] + ["slippage_cpmm"]
+    columns.update(zip(names, curve_slippage(data, scaling)))
+    return columns
+
+
+def _table_response(slippage):
+    try:
+        params = _curve_request_params()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if params["grid"] == "adaptive" and (slippage or _streaming_requested()):
+        # Slippage is defined per fixed step Δx; streaming works on fixed blocks
+        return jsonify({"error": "grid=adaptive is only available for non-streamed /curve"}), 400
+
+    # Streamed NDJSON/CSV is generated block by block, so memory stays flat
+    # and the first rows go out before the whole grid is computed
+    headers = {"Vary": "Accept"}
+    if _streaming_requested():
+        try:
+            mimetype = tableformat.negotiate(request, tableformat.STREAM_FORMATS)
+        except tableformat.NotAcceptable as e:
+            return jsonify({"error": str(e), "formats": list(tableformat.STREAM_FORMATS)}), 406
+        params["points"] = min(params["points"], MAX_STREAM_POINTS)
+        blocks = _iter_curve_columns(params, slippage)
+        if mimetype == tableformat.CSV:
+            return Response(tableformat.iter_csv(blocks), mimetype=mimetype, headers=headers)
+        return Response(tableformat.iter_ndjson(blocks), mimetype=mimetype, headers=headers)
+
+    try:
+        mimetype = tableformat.negotiate(request)
+    except tableformat.NotAcceptable as e:
+        return jsonify({"error": str(e), "formats": tableformat.available_formats()}), 406
+
+    params["points"] = min(params["points"], MAX_POINTS)
+    columns = _curve_columns(params, slippage)
+    if params["cache"]:
+        # Interpolated from the normalized-curve cache: no y solver ran
+        params = {**params, "solver": None}
+    if mimetype == tableformat.CSV:
+        return Response(tableformat.to_csv(columns), mimetype=mimetype, headers=headers)
+    if mimetype == tableformat.ARROW:
+        return Response(tableformat.to_arrow(columns, params), mimetype=mimetype, headers=headers)
+    return jsonify(tableformat.to_json(columns, params)), 200, headers
+
+
+@app.route("/curve", methods=["GET"])
+def curve():
+    """x grid, y for each A and the CPMM reference; no rendering or upload"""
+    return _table_response(slippage=False)
+
+
+@app.route("/slippage", methods=["GET"])
+def slippage():
+    """Slippage series for each A and the CPMM reference; no rendering or upload"""
+    return _table_response(slippage=True)
 
 
 if __name__ == "__main__":
-    # When run directly → start Flask API, no auto-plot
+    # When run directly → start the Flask development server, no auto-plot.
+    # Production (the Docker image) runs: gunicorn -c gunicorn.conf.py main:app
+    if os.environ.get("AMM_WARMUP", "0") == "1":
+        warm_up()
     port = int(os.environ.get("PORT", 8080))
     app.run(host="0.0.0.0", port=port) 
 
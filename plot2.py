@@ -1,6 +1,7 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from classcode.curve_pool import CurveStableSwap2Pool
+from classcode.dsolver import compute_D
+from classcode.curvecache import curve_y
 
 def plot_curves_multiA(
     out_file="/tmp/stableswap_multiA.png",
@@ -22,19 +23,11 @@ def plot_curves_multiA(
     plt.plot(x_values/scaling, straight_y/scaling, 'k--', label="Straight line y = L - x")
 
     for A in A_values:
-        pool = CurveStableSwap2Pool(liquidity // 2, liquidity // 2, A=A)
-        D0 = pool.D
-        curve_y = []
-
-        for x in x_values:
-            try:
-                pool.D = D0
-                y_curve = pool._get_y(x)
-                curve_y.append(y_curve)
-            except Exception:
-                curve_y.append(np.nan)
-
-        plt.plot(x_values/scaling, np.array(curve_y)/scaling, label=f'StableSwap A={A}')
+        D0 = compute_D(liquidity // 2, liquidity // 2, A)
+        # rescaled from the shared normalized curve for this A
+        y_values = curve_y(x_values, A, D0)
+
+        plt.plot(x_values/scaling, y_values/scaling, label=f'StableSwap A={A}')
 
     # balanced point
     plt.plot(liquidity/2/scaling, liquidity/2/scaling, 'ro', label="Balanced Point")
@@ -0,0 +1,196 @@
+# render.py
+"""
+Figure rendering without pyplot.
+
+A figure is described by a plain spec dict (arrays, labels, limits) and
+drawn on its own matplotlib Figure with an Agg canvas, which is released
+as soon as the PNG bytes are out. Nothing goes through pyplot's global
+figure manager, so no figures pile up in a long-lived server and
+concurrent requests never draw on each other's figures.
+
+Spec keys:
+    lines    list of {"x", "y", "fmt", "label", plus plot kwargs
+             such as linewidth, alpha, markersize}
+    figsize, xlabel, ylabel, title, xlim, ylim,
+    legend   (default True), grid_alpha (default 0.3), dpi
+
+render_figures() fans a set of specs out over a process pool when
+RENDER_PROCESSES > 1; the series arrays go through one shared-memory
+block per call rather than being pickled to every worker.
+"""
+import multiprocessing
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+LINE_KWARGS = ("label", "linewidth", "alpha", "markersize", "color")
+ARRAY_KEYS = ("x", "y")
+
+RENDER_PROCESSES = int(os.environ.get("RENDER_PROCESSES", min(os.cpu_count() or 1, 6)))
+RENDER_START_METHOD = os.environ.get(
+    "RENDER_START_METHOD",
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+
+
+def line(x, y, fmt="-", **kwargs) -> dict:
+    """One plotted series of a figure spec"""
+    return {"x": x, "y": y, "fmt": fmt, **kwargs}
+
+
+def render_png(spec: dict) -> bytes:
+    """Draw spec on a fresh Figure/Agg canvas and return the PNG bytes"""
+    # Imported here so that importing this module (and main) stays cheap
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=spec.get("figsize", (12, 6)), dpi=spec.get("dpi", 100))
+    FigureCanvasAgg(fig)
+    try:
+        ax = fig.add_subplot()
+        for series in spec["lines"]:
+            kwargs = {k: series[k] for k in LINE_KWARGS if series.get(k) is not None}
+            ax.plot(np.atleast_1d(series["x"]), np.atleast_1d(series["y"]), series.get("fmt", "-"),
+                    **kwargs)
+
+        if "xlabel" in spec:
+            ax.set_xlabel(spec["xlabel"])
+        if "ylabel" in spec:
+            ax.set_ylabel(spec["ylabel"])
+        if "title" in spec:
+            ax.set_title(spec["title"])
+        if spec.get("legend", True):
+            ax.legend()
+        if spec.get("grid_alpha") is not False:
+            ax.grid(True, alpha=spec.get("grid_alpha", 0.3))
+        if "xlim" in spec:
+            ax.set_xlim(*spec["xlim"])
+        if "ylim" in spec:
+            ax.set_ylim(*spec["ylim"])
+        fig.tight_layout()
+
+        buf = BytesIO()
+        fig.savefig(buf, format="png")
+        return buf.getvalue()
+    finally:
+        # Drop the artists now rather than whenever the figure is collected
+        fig.clear()
+
+
+def render_all(specs: dict) -> dict:
+    """{name: spec} -> {name: PNG bytes}, rendered in order"""
+    return {name: render_png(spec) for name, spec in specs.items()}
+
+
+# Where a series array lives inside the shared block
+_SharedArray = namedtuple("_SharedArray", "offset shape")
+
+
+def _pack(specs: dict):
+    """
+    Copy every series array of specs into one new SharedMemory block.
+    Returns the block and specs with those arrays replaced by _SharedArray.
+    """
+    arrays, packed = [], {}
+    nbytes = 0
+    for name, spec in specs.items():
+        lines = []
+        for series in spec["lines"]:
+            series = dict(series)
+            for key in ARRAY_KEYS:
+                a = np.ascontiguousarray(np.atleast_1d(series[key]), dtype=float)
+                arrays.append((nbytes, a))
+                series[key] = _SharedArray(nbytes, a.shape)
+                nbytes += a.nbytes
+            lines.append(series)
+        packed[name] = {**spec, "lines": lines}
+
+    shm = SharedMemory(create=True, size=max(nbytes, 1))
+    for offset, a in arrays:
+        np.ndarray(a.shape, dtype=float, buffer=shm.buf, offset=offset)[...] = a
+    return shm, packed
+
+
+def _render_shared(shm_name: str, spec: dict) -> bytes:
+    """Worker side: attach to the block, render spec from views into it"""
+    shm = SharedMemory(name=shm_name)
+    try:
+        lines = []
+        for series in spec["lines"]:
+            series = dict(series)
+            for key in ARRAY_KEYS:
+                ref = series[key]
+                series[key] = np.ndarray(ref.shape, dtype=float, buffer=shm.buf, offset=ref.offset)
+            lines.append(series)
+        png = render_png({**spec, "lines": lines})
+        del lines, series
+        return png
+    finally:
+        try:
+            shm.close()
+        except BufferError:
+            # A view is still held by a not-yet-collected artist cycle
+            import gc
+            gc.collect()
+            shm.close()
+
+
+def _init_worker():
+    # Load the Agg stack once per worker instead of inside the first render
+    import matplotlib.figure  # noqa: F401
+    import matplotlib.backends.backend_agg  # noqa: F401
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    # Created on first use, i.e. inside a server worker rather than before it forks
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            ctx = multiprocessing.get_context(RENDER_START_METHOD)
+            if RENDER_START_METHOD == "forkserver":
+                ctx.set_forkserver_preload(["render"])
+            _pool = ProcessPoolExecutor(max_workers=RENDER_PROCESSES, mp_context=ctx,
+                                        initializer=_init_worker)
+        return _pool
+
+
+def shutdown(wait: bool = True):
+    """Stop the render processes (they are started again on next use)"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=not wait)
+
+
+def render_figures(specs: dict, processes: int = None) -> dict:
+    """
+    {name: spec} -> {name: PNG bytes}, in the order of specs. With more
+    than one process (default RENDER_PROCESSES) the figures are rendered
+    in parallel on the shared pool; otherwise, or if the pool breaks,
+    they are rendered one by one in this thread.
+    """
+    processes = RENDER_PROCESSES if processes is None else processes
+    if processes <= 1 or len(specs) <= 1:
+        return render_all(specs)
+
+    shm, packed = _pack(specs)
+    try:
+        pool = _get_pool()
+        futures = {name: pool.submit(_render_shared, shm.name, spec) for name, spec in packed.items()}
+        return {name: future.result() for name, future in futures.items()}
+    except BrokenProcessPool:
+        shutdown(wait=False)
+        return render_all(specs)
+    finally:
+        shm.close()
+        shm.unlink()
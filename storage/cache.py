@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from .sqlite import ProcessConnection
+
+RESULT_CACHE_DB = os.environ.get("RESULT_CACHE_DB", "/tmp/amm_results.sqlite")
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", 256))
+
+
+def cache_key(params: dict, engine_version: str) -> str:
+    """Content address for a parameter set: sha256 of its canonical JSON"""
+    payload = json.dumps({"engine": engine_version, "params": params},
+                         sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Maps a cache key to a stored result (the artifact URLs of an earlier
+    run). An in-process LRU sits in front of a SQLite index, so results
+    survive restarts of the process and are shared by workers on the
+    same instance. Each entry records the name its artifacts were stored
+    under; storing a new result under that name drops the older entries,
+    since their objects have just been overwritten. Keys must therefore
+    cover the name too, so a hit only returns objects stored under the
+    name that was asked for. SQLite is the source of truth: an LRU hit is
+    only returned while its row still exists, since another worker may
+    have re-rendered the name and dropped it.
+    """
+
+    def __init__(self, path: str = RESULT_CACHE_DB, maxsize: int = RESULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = ProcessConnection(path, (
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, name TEXT NOT NULL, result TEXT NOT NULL,"
+            " created REAL NOT NULL)"
+        ))
+
+    def _remember(self, key: str, name: str, result: dict):
+        self._lru[key] = (name, result)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+
+    def get(self, key: str):
+        with self._lock:
+            try:
+                if key in self._lru:
+                    # Cheap existence check; the LRU only saves the JSON decode
+                    row = self._db().execute(
+                        "SELECT 1 FROM results WHERE key = ?", (key,)).fetchone()
+                    if row is None:
+                        del self._lru[key]
+                        return None
+                    self._lru.move_to_end(key)
+                    return self._lru[key][1]
+                row = self._db().execute(
+                    "SELECT name, result FROM results WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error as e:
+                print("❌ Result cache read failed:", e)
+                return None
+            if row is None:
+                return None
+            result = json.loads(row[1])
+            self._remember(key, row[0], result)
+            return result
+
+    def put(self, key: str, name: str, result: dict):
+        with self._lock:
+            for stale in [k for k, (n, _) in self._lru.items() if n == name and k != key]:
+                del self._lru[stale]
+            self._remember(key, name, result)
+            try:
+                with self._db() as conn:
+                    conn.execute("DELETE FROM results WHERE name = ? AND key != ?", (name, key))
+                    conn.execute(
+                        "INSERT OR REPLACE INTO results (key, name, result, created)"
+                        " VALUES (?, ?, ?, ?)",
+                        (key, name, json.dumps(result), time.time()))
+            except sqlite3.Error as e:
+                print("❌ Result cache write failed:", e)
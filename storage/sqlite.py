@@ -0,0 +1,24 @@
+# storage/sqlite.py
+import os
+import sqlite3
+
+
+class ProcessConnection:
+    """
+    Callable returning a SQLite connection to path, opened lazily once per
+    process (so it is never shared across a fork) and created with schema
+    on first open. Callers serialise access with their own lock.
+    """
+
+    def __init__(self, path: str, schema: str):
+        self.path = path
+        self.schema = schema
+        self._conn = None
+        self._pid = None
+
+    def __call__(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            self._conn.execute(self.schema)
+            self._pid = os.getpid()
+        return self._conn
@@ -1,21 +1,57 @@
+import io
+import mimetypes
 import os
-import boto3
-from botocore.exceptions import ClientError
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 BUCKET_NAME = os.environ.get("AWS_BUCKET_NAME", "ammresearch2")
 REGION = os.environ.get("AWS_DEFAULT_REGION", "eu-north-1")
+UPLOAD_CONCURRENCY = int(os.environ.get("UPLOAD_CONCURRENCY", 8))
+
+_s3 = None
+_s3_lock = threading.Lock()
+
+
+def get_s3():
+    """S3 client, created on first use so importing this module stays cheap"""
+    global _s3
+    with _s3_lock:
+        if _s3 is None:
+            import boto3
+            _s3 = boto3.client("s3", region_name=REGION)
+        return _s3
 
-s3 = boto3.client("s3", region_name=REGION)
 
 def upload_file(local_file, remote_name="example.png"):
     """Upload a file to AWS S3"""
     try:
         print(f"🔍 Uploading {local_file} → s3://{BUCKET_NAME}/{remote_name}")
-        s3.upload_file(local_file, BUCKET_NAME, remote_name)
+        get_s3().upload_file(local_file, BUCKET_NAME, remote_name)
+        url = f"https://{BUCKET_NAME}.s3.{REGION}.amazonaws.com/{remote_name}"
+        return {"url": url, "bucket": BUCKET_NAME, "key": remote_name}
+
+    except Exception as e:
+        return _error_result(e)
+
+
+def upload_fileobj(data, remote_name="example.png", content_type=None):
+    """Upload in-memory bytes (or a file-like object) to AWS S3"""
+    try:
+        fileobj = io.BytesIO(data) if isinstance(data, (bytes, bytearray)) else data
+        extra = {"ContentType": content_type} if content_type else None
+        print(f"🔍 Uploading <memory> → s3://{BUCKET_NAME}/{remote_name}")
+        get_s3().upload_fileobj(fileobj, BUCKET_NAME, remote_name, ExtraArgs=extra)
         url = f"https://{BUCKET_NAME}.s3.{REGION}.amazonaws.com/{remote_name}"
         return {"url": url, "bucket": BUCKET_NAME, "key": remote_name}
 
-    except ClientError as e:
+    except Exception as e:
+        return _error_result(e)
+
+
+def _error_result(e):
+    """Shape an upload exception into the result dict returned to callers"""
+    from botocore.exceptions import ClientError
+    if isinstance(e, ClientError):
         # Extract structured AWS error
         err = e.response["Error"]
         print("❌ AWS ClientError:", err)
@@ -26,8 +62,47 @@ def upload_file(local_file, remote_name="example.png"):
             "http_status": e.response.get("ResponseMetadata", {}).get("HTTPStatusCode"),
         }
 
-    except Exception as e:
-        # Catch anything else
-        print("❌ Unexpected error:", str(e))
-        return {"error": "Unexpected", "message": str(e)}
+    # Catch anything else
+    print("❌ Unexpected error:", str(e))
+    return {"error": "Unexpected", "message": str(e)}
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Shared upload pool, created on first use (after any server fork)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=UPLOAD_CONCURRENCY,
+                                           thread_name_prefix="upload")
+        return _executor
+
+
+def upload_many(pairs, on_done=None):
+    """
+    Upload (source, remote_name) pairs concurrently on the shared pool.
+    source is a local file path or in-memory bytes. Duplicate pairs
+    are uploaded once. on_done(done_count, total) is called as each upload
+    finishes. Returns {(source, remote_name): result} with the same result
+    shape as upload_file.
+    """
+    unique = list(dict.fromkeys(pairs))
+    executor = _get_executor()
+    futures = {}
+    for source, remote in unique:
+        if isinstance(source, (bytes, bytearray)):
+            content_type = mimetypes.guess_type(remote)[0]
+            future = executor.submit(upload_fileobj, source, remote, content_type)
+        else:
+            future = executor.submit(upload_file, source, remote)
+        futures[future] = (source, remote)
 
+    results = {}
+    for future in as_completed(futures):
+        results[futures[future]] = future.result()
+        if on_done is not None:
+            on_done(len(results), len(unique))
+    return results
@@ -0,0 +1,108 @@
+# tableformat.py
+import csv
+import importlib.util
+import io
+import json
+import math
+
+import numpy as np
+
+# pyarrow is imported by to_arrow on first use, so it adds nothing to startup
+HAVE_ARROW = importlib.util.find_spec("pyarrow") is not None
+
+JSON = "application/json"
+CSV = "text/csv"
+ARROW = "application/vnd.apache.arrow.stream"
+NDJSON = "application/x-ndjson"
+
+FORMATS = {"json": JSON, "csv": CSV, "arrow": ARROW, "ndjson": NDJSON}
+
+# Formats that can be written row block by row block
+STREAM_FORMATS = (NDJSON, CSV)
+
+
+class NotAcceptable(Exception):
+    """Raised when none of the requested formats can be produced."""
+
+
+def available_formats():
+    return [JSON, CSV] + ([ARROW] if HAVE_ARROW else [])
+
+
+def negotiate(request, formats=None) -> str:
+    """
+    Pick the response media type out of formats (default: everything
+    available): an explicit ?format=json|csv|arrow|ndjson wins, otherwise
+    the best match from the Accept header (the first format if none given).
+    """
+    formats = list(formats or available_formats())
+    name = request.args.get("format")
+    if name is not None:
+        mimetype = FORMATS.get(name.lower())
+        if mimetype is None or mimetype not in formats:
+            raise NotAcceptable(f"unsupported format '{name}'")
+        return mimetype
+    if not request.accept_mimetypes:
+        return formats[0]
+    mimetype = request.accept_mimetypes.best_match(formats)
+    if mimetype is None:
+        raise NotAcceptable("none of the accepted media types can be produced")
+    return mimetype
+
+
+def _json_value(v):
+    return None if math.isnan(v) else v
+
+
+def to_json(columns, params) -> dict:
+    """Columns as plain lists; NaN (no solution) becomes null"""
+    return {
+        "params": params,
+        "columns": {name: [_json_value(v) for v in np.asarray(col, dtype=float).tolist()]
+                    for name, col in columns.items()},
+    }
+
+
+def _rows(columns):
+    return zip(*(np.asarray(col, dtype=float).tolist() for col in columns.values()))
+
+
+def _csv_text(rows, header=None) -> str:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if header is not None:
+        writer.writerow(header)
+    writer.writerows(["" if math.isnan(v) else repr(v) for v in row] for row in rows)
+    return buf.getvalue()
+
+
+def to_csv(columns) -> str:
+    """One header row, one row per grid point; NaN is left empty"""
+    return _csv_text(_rows(columns), header=columns)
+
+
+def iter_csv(blocks):
+    """to_csv over a stream of column blocks: the header, then one chunk per block"""
+    for i, columns in enumerate(blocks):
+        yield _csv_text(_rows(columns), header=columns if i == 0 else None)
+
+
+def iter_ndjson(blocks):
+    """One JSON object per grid point, one chunk per block; NaN becomes null"""
+    for columns in blocks:
+        names = list(columns)
+        yield "".join(json.dumps(dict(zip(names, map(_json_value, row)))) + "\n"
+                      for row in _rows(columns))
+
+
+def to_arrow(columns, params) -> bytes:
+    """Arrow IPC stream with float64 columns; params go in the schema metadata"""
+    import pyarrow as pa
+
+    table = pa.table({name: pa.array(np.asarray(col, dtype=float), from_pandas=True)
+                      for name, col in columns.items()})
+    table = table.replace_schema_metadata({k: str(v) for k, v in params.items()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
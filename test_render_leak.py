@@ -0,0 +1,76 @@
+# test_render_leak.py
+"""
+Regression tests for render.py: repeated renders must not grow the
+process, and concurrent renders (threads or the process pool) must
+not interfere.
+
+Run with: python -m pytest -q test_render_leak.py
+"""
+import gc
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from render import line, render_figures, render_png, shutdown
+
+RENDERS = 1000
+# Allowed RSS growth over RENDERS renders after warm-up (allocator noise)
+MAX_GROWTH_MB = 10
+
+
+def _spec(k=0):
+    x = np.linspace(0, 1, 200)
+    return {
+        "figsize": (3, 2),
+        "dpi": 50,
+        "lines": [line(x, np.sin(x * (k + 1)), 'b-', label=f'k={k}'),
+                  line(x, x, 'r--', label='x', linewidth=2)],
+        "xlabel": "x", "ylabel": "y", "title": f"render {k}",
+        "xlim": (0, 1),
+    }
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="needs /proc (Linux)")
+def test_rss_flat_over_many_renders():
+    for k in range(50):     # warm-up: font cache, Agg buffers, allocator pools
+        render_png(_spec(k))
+    gc.collect()
+    before = _rss_mb()
+    for k in range(RENDERS):
+        render_png(_spec(k))
+    gc.collect()
+    growth = _rss_mb() - before
+    assert growth < MAX_GROWTH_MB, f"RSS grew {growth:.1f} MB over {RENDERS} renders"
+
+
+def test_no_pyplot_figures_left_open():
+    render_png(_spec())
+    import matplotlib.pyplot as plt
+    assert plt.get_fignums() == []
+
+
+def test_concurrent_renders_match_serial():
+    specs = [_spec(k) for k in range(16)]
+    serial = [render_png(s) for s in specs]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        parallel = list(pool.map(render_png, specs))
+    assert parallel == serial
+
+
+def test_process_pool_matches_serial():
+    specs = {f"fig{k}": _spec(k) for k in range(6)}
+    serial = {name: render_png(s) for name, s in specs.items()}
+    try:
+        parallel = render_figures(specs, processes=2)
+    finally:
+        shutdown()
+    assert list(parallel) == list(specs)
+    assert parallel == serial
@@ -0,0 +1,32 @@
+# test_result_cache.py
+"""
+ResultCache under several workers sharing one SQLite index.
+
+Run with: python -m pytest -q test_result_cache.py
+"""
+from storage.cache import ResultCache
+
+
+def test_rerender_by_another_worker_invalidates_lru(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    w1, w2 = ResultCache(path), ResultCache(path)
+
+    w1.put("k_P1", "F.png", {"main": "P1"})
+    assert w1.get("k_P1") == {"main": "P1"}
+    assert w2.get("k_P1") == {"main": "P1"}
+
+    # Worker 2 re-renders F.png with other parameters, overwriting the objects
+    w2.put("k_P2", "F.png", {"main": "P2"})
+    assert w1.get("k_P1") is None
+    assert w2.get("k_P1") is None
+    assert w1.get("k_P2") == {"main": "P2"}
+
+
+def test_hit_survives_other_names(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    w1, w2 = ResultCache(path), ResultCache(path)
+
+    w1.put("k_a", "a.png", {"main": "a"})
+    w2.put("k_b", "b.png", {"main": "b"})
+    assert w1.get("k_a") == {"main": "a"}
+    assert w1.get("k_b") == {"main": "b"}
@@ -0,0 +1,42 @@
+# test_startup.py
+"""
+Cold-start budget: importing main must stay cheap.
+
+Run with: python -m pytest -q test_startup.py
+STARTUP_BUDGET_SECONDS overrides the wall-clock budget for `import main`.
+"""
+import os
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BUDGET_SECONDS = float(os.environ.get("STARTUP_BUDGET_SECONDS", 2.0))
+
+# Loaded on first use only (rendering, uploads), never at import
+LAZY_MODULES = ("matplotlib", "matplotlib.pyplot", "boto3", "botocore", "pyarrow")
+
+
+def _run(code: str) -> str:
+    out = subprocess.run([sys.executable, "-c", code], cwd=HERE, check=True,
+                         capture_output=True, text=True)
+    return out.stdout
+
+
+def test_import_main_within_budget():
+    # Best of three, so one slow run on a busy machine does not fail the test
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        _run("import main")
+        timings.append(time.perf_counter() - start)
+    assert min(timings) <= BUDGET_SECONDS, (
+        f"import main took {min(timings):.2f}s, budget {BUDGET_SECONDS:.2f}s")
+
+
+def test_heavy_modules_stay_lazy():
+    loaded = _run(
+        "import sys, main; "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    ).strip()
+    assert loaded == "", f"imported at startup: {loaded}"
@@ -0,0 +1,32 @@
+# test_tableformat.py
+"""
+The table serialisers agree with each other.
+
+Run with: python -m pytest -q test_tableformat.py
+"""
+import pyarrow as pa
+
+import main
+import tableformat
+
+
+def test_arrow_matches_json():
+    client = main.app.test_client()
+    query = "points=50&A1=1&A2=10&A3=100"
+    expected = client.get(f"/curve?{query}").get_json()
+
+    response = client.get(f"/curve?{query}", headers={"Accept": tableformat.ARROW})
+    assert response.status_code == 200
+    assert response.mimetype == tableformat.ARROW
+
+    table = pa.ipc.open_stream(response.data).read_all()
+    assert table.column_names == list(expected["columns"])
+    for name, values in expected["columns"].items():
+        assert table.column(name).to_pylist() == values
+    assert table.schema.metadata[b"points"] == b"50"
+
+
+def test_arrow_nan_is_null():
+    data = tableformat.to_arrow({"x": [1.0, 2.0], "y": [0.5, float("nan")]}, {"points": 2})
+    table = pa.ipc.open_stream(data).read_all()
+    assert table.column("y").to_pylist() == [0.5, None]
@@ -1,17 +1,26 @@
 import os
-import boto3
-from botocore.exceptions import ClientError
 
 BUCKET_NAME = os.environ.get("AWS_BUCKET_NAME", "ammresearch2")
 REGION = os.environ.get("AWS_DEFAULT_REGION", "eu-north-1")
 
-s3 = boto3.client("s3", region_name=REGION)
+_s3 = None
+
+
+def get_s3():
+    """S3 client, created on first use so importing this module stays cheap"""
+    global _s3
+    if _s3 is None:
+        import boto3
+        _s3 = boto3.client("s3", region_name=REGION)
+    return _s3
+
 
 def upload_file(local_file, remote_name="example.png"):
     """Upload a file to AWS S3"""
+    from botocore.exceptions import ClientError
     try:
         print(f"🔍 Uploading {local_file} → s3://{BUCKET_NAME}/{remote_name}")
-        s3.upload_file(local_file, BUCKET_NAME, remote_name)
+        get_s3().upload_file(local_file, BUCKET_NAME, remote_name)
         url = f"https://{BUCKET_NAME}.s3.{REGION}.amazonaws.com/{remote_name}"
         return {"url": url, "bucket": BUCKET_NAME, "key": remote_name}
 
@@ -31,3 +40,14 @@ def upload_file(local_file, remote_name="example.png"):
         print("❌ Unexpected error:", str(e))
         return {"error": "Unexpected", "message": str(e)}
 
+
+def upload_or_plan(local_file, remote_name, upload=True, label="Upload"):
+    """
+    upload_file(local_file, remote_name), or with upload=False only the
+    (local_file, remote_name) pair, for callers that batch their uploads.
+    """
+    if not upload:
+        return (local_file, remote_name)
+    result = upload_file(local_file, remote_name)
+    print(f"✅ {label} result:", result)
+    return result